@@ -18,7 +18,11 @@ a = Analysis(
         'lxml.etree',
         'flask',
         'flask_cors',
+        'waitress',
         'openpyxl',
+        'orjson',
+        'watchdog',
+        'watchdog.observers',
         'openpyxl.cell',
         'openpyxl.cell.cell',
         'tkinter',
@@ -1,14 +1,28 @@
 import os
 import sys
 import logging
+from logging.handlers import QueueHandler, QueueListener, RotatingFileHandler
 from pathlib import Path
 import json
 import re
+import errno
+import socket
+import stat
+import string
+from html import escape
 import time
 import csv
+import hashlib
+import mmap
+import copy
+import functools
 import threading
+import queue
+import atexit
+import binascii
 from datetime import datetime
-from collections import defaultdict
+from collections import OrderedDict, deque
+from concurrent.futures import Future, ThreadPoolExecutor
 
 
 # --- ZMIENNE GLOBALNE I WSTĘPNA KONFIGURACJA ---
@@ -28,16 +42,28 @@ LOG_DIR = USER_DATA_DIR / 'logs'
 LOG_DIR.mkdir(parents=True, exist_ok=True)
 
 PORT_FILE = USER_DATA_DIR / 'app_port.txt'
-MANUAL_SCAN_LOG_FILE = USER_DATA_DIR / 'manual_scans_log.json'
-PDI_CHECK_LOG_FILE = USER_DATA_DIR / 'pdi_checks_log.json'
+SETTINGS_INDEX_FILE = USER_DATA_DIR / 'settings_index.json'
+STATS_FILE = USER_DATA_DIR / 'stats_cache.json'
+MANUAL_SCAN_LOG_FILE = USER_DATA_DIR / 'manual_scans_log.jsonl'
+PDI_CHECK_LOG_FILE = USER_DATA_DIR / 'pdi_checks_log.jsonl'
+LEGACY_MANUAL_SCAN_LOG_FILE = USER_DATA_DIR / 'manual_scans_log.json'
+LEGACY_PDI_CHECK_LOG_FILE = USER_DATA_DIR / 'pdi_checks_log.json'
 
 
 # --- EARLY LOGGING ---
-logging.basicConfig(
-    filename=LOG_DIR / 'app.log',
-    level=logging.INFO,
-    format='%(asctime)s - %(levelname)s - %(message)s'
-)
+# Request threads only enqueue records; a background listener does the file I/O
+_log_queue = queue.Queue(-1)
+LOG_MAX_BYTES = 5_000_000
+LOG_BACKUP_COUNT = 3
+_log_file_handler = RotatingFileHandler(LOG_DIR / 'app.log', maxBytes=LOG_MAX_BYTES,
+                                        backupCount=LOG_BACKUP_COUNT, encoding='utf-8')
+_log_file_handler.setFormatter(logging.Formatter('%(asctime)s - %(levelname)s - %(message)s'))
+_log_listener = QueueListener(_log_queue, _log_file_handler, respect_handler_level=True)
+_log_listener.start()
+atexit.register(_log_listener.stop)
+logging.getLogger().addHandler(QueueHandler(_log_queue))
+# SC_DEBUG=1 włącza szczegółowe logi (postęp skanowania, wartości PDI)
+logging.getLogger().setLevel(logging.DEBUG if os.environ.get('SC_DEBUG') else logging.INFO)
 logging.info("========================================")
 logging.info(f"=== PID: {os.getpid()} Starting Software Checker Server (v3.0.0 - PDI Check) ===")
 logging.info("Step 1: Early logging initialized. Attempting library imports...")
@@ -48,7 +74,7 @@ USE_WEBVIEW = True  # Set to False to use browser instead
 
 try:
     from lxml import etree as ET
-    from flask import Flask, request, jsonify, send_from_directory
+    from flask import Flask, Response, request, jsonify, send_from_directory
     from flask_cors import CORS
     
     # IMPORT for tkinter (optional - for file dialogs)
@@ -75,11 +101,13 @@ try:
     try:
         import win32com.client as win32
         import pywintypes
+        import pythoncom
         logging.info("Import 'pywin32' (Outlook) successful.")
     except ImportError:
         logging.warning("'pywin32' library not found. Email functionality disabled.")
         win32 = None
         pywintypes = None
+        pythoncom = None
 
     # IMPORT for Windows Toasts
     try:
@@ -100,6 +128,36 @@ try:
         logging.warning("'webview' library not found. Will use browser mode.")
         webview = None
 
+    # IMPORT for Settings folder watching (optional - falls back to re-scanning)
+    try:
+        from watchdog.observers import Observer
+        from watchdog.events import FileSystemEventHandler
+        WATCHDOG_AVAILABLE = True
+        logging.info("Import 'watchdog' successful. Settings folder watching enabled.")
+    except ImportError:
+        WATCHDOG_AVAILABLE = False
+        logging.warning("'watchdog' library not found. Settings folder will be re-scanned per check.")
+        Observer = None
+        FileSystemEventHandler = object
+
+    # IMPORT for production WSGI server (optional - falls back to Flask dev server)
+    try:
+        from waitress import serve as waitress_serve
+        WAITRESS_AVAILABLE = True
+        logging.info("Import 'waitress' successful. Using production WSGI server.")
+    except ImportError:
+        WAITRESS_AVAILABLE = False
+        waitress_serve = None
+        logging.warning("'waitress' library not found. Using Flask development server.")
+
+    # IMPORT for fast JSON (optional - falls back to stdlib json)
+    try:
+        import orjson
+        logging.info("Import 'orjson' successful.")
+    except ImportError:
+        logging.warning("'orjson' library not found. Using standard json module.")
+        orjson = None
+
 except ImportError as e:
     logging.critical(f"=== CRITICAL IMPORT FAILURE: {e} ===")
     logging.critical("Server cannot start. Missing key library.")
@@ -114,7 +172,34 @@ STATIC_FILES_DIR = BUNDLE_DIR / 'files'
 JSON_DIR = USER_DATA_DIR / 'json'
 CONFIG_FILE = JSON_DIR / 'config.json'
 
-SECURE_PARSER = ET.XMLParser(resolve_entities=False)
+# Compiled once; prefix passed as an XPath variable instead of formatted into the expression
+_FIND_TE_PREFIX = ET.XPath(".//te[starts-with(@id, $pfx)]", smart_strings=False)
+# <description> of an <info> whose <name> equals $name (evaluated on each streamed <info>)
+_FIND_SNR_DESCRIPTION = ET.XPath("self::info[name = $name]/description", smart_strings=False)
+
+# JSON do plików (logi, config): orjson gdy dostępny, zwraca bytes -> pliki otwierane binarnie
+if orjson is not None:
+    _json_loads = orjson.loads
+
+    def _json_compact(obj):
+        return orjson.dumps(obj)
+
+    def _json_line(obj):
+        return orjson.dumps(obj, option=orjson.OPT_APPEND_NEWLINE)
+
+    def _json_pretty(obj):
+        return orjson.dumps(obj, option=orjson.OPT_INDENT_2)
+else:
+    _json_loads = json.loads
+
+    def _json_compact(obj):
+        return json.dumps(obj, ensure_ascii=False, separators=(',', ':')).encode('utf-8')
+
+    def _json_line(obj):
+        return (json.dumps(obj, ensure_ascii=False, separators=(',', ':')) + '\n').encode('utf-8')
+
+    def _json_pretty(obj):
+        return json.dumps(obj, indent=2).encode('utf-8')
 
 # Konfiguracja domyślna
 DEFAULT_CONFIG = {
@@ -133,41 +218,96 @@ csv_lock = threading.Lock()
 outlook_lock = threading.Lock()
 manual_scan_lock = threading.Lock()
 pdi_check_lock = threading.Lock()
+config_save_lock = threading.Lock()
+
+# Shared pool for post-processing (JSON logs, toasts) instead of a new thread per task
+_bg_pool = ThreadPoolExecutor(max_workers=4, thread_name_prefix="sc-bg")
+atexit.register(_bg_pool.shutdown, wait=False)
 
 
 # --- Flask Application ---
 app = Flask(__name__, static_folder=STATIC_FILES_DIR, static_url_path='')
 CORS(app)
+
+if orjson is not None:
+    from flask.json.provider import DefaultJSONProvider
+
+    class _OrjsonProvider(DefaultJSONProvider):
+        """jsonify() i request.json przez orjson; typy spoza orjson obsługuje domyślny konwerter Flask."""
+        _OPTIONS = orjson.OPT_SORT_KEYS | orjson.OPT_NON_STR_KEYS
+
+        def dumps(self, obj, **kwargs):
+            return orjson.dumps(obj, default=self.default, option=self._OPTIONS).decode('utf-8')
+
+        def loads(self, s, **kwargs):
+            return orjson.loads(s)
+
+        def response(self, *args, **kwargs):
+            obj = self._prepare_response_obj(args, kwargs)
+            body = orjson.dumps(obj, default=self.default, option=self._OPTIONS | orjson.OPT_APPEND_NEWLINE)
+            return self._app.response_class(body, mimetype=self.mimetype)
+
+    app.json = _OrjsonProvider(app)
 logging.info("Step 3: Flask application initialized.")
 
 
 # === Toast Notification Helper ===
+_toaster_state = {"toaster": None, "lock": threading.Lock()}
+
+
+def _get_toaster():
+    """Jeden WindowsToaster na proces - rejestracja AppUserModelID tylko przy pierwszym użyciu."""
+    with _toaster_state["lock"]:
+        if _toaster_state["toaster"] is None:
+            _toaster_state["toaster"] = WindowsToaster('Software Checker')
+        return _toaster_state["toaster"]
+
+
 def send_toast(title, line1, line2=""):
-    """Wysyła powiadomienie Windows Toast w osobnym wątku."""
+    """Wysyła powiadomienie Windows Toast w wątku puli tła."""
     if not WINDOWS_TOASTS_ENABLED:
         return
 
     def toast_thread():
         try:
-            toaster = WindowsToaster('Software Checker')
             new_toast = Toast()
             new_toast.text_fields = [title, line1, line2]
-            toaster.show_toast(new_toast)
-            logging.info(f"Sent toast notification: {title} - {line1}")
+            _get_toaster().show_toast(new_toast)
+            logging.debug(f"Sent toast notification: {title} - {line1}")
         except Exception as e:
+            _toaster_state["toaster"] = None  # następna próba utworzy notifier od nowa
             logging.warning(f"Failed to show toast notification: {e}", exc_info=True)
 
-    threading.Thread(target=toast_thread, daemon=True).start()
+    _bg_pool.submit(toast_thread)
 
 
 # === Helper Functions ===
+_HEX_ONLY_RE = re.compile(r'[^0-9A-F]')
+_HEX_ONLY_ANYCASE_RE = re.compile(r'[^0-9A-Fa-f]')
+# Matched against ASCII-uppercased text - avoids the slower IGNORECASE matching
+_BYTES_RE = re.compile(r'([0-9A-F]{2}(?:\s*[0-9A-F]{2}){2,})')
+_DATE_IN_NAME_RE = re.compile(r'_(\d{14})\.xml$')
+# YYYY-MM-DD[(-|_)HH(-|_)MM(-|_)SS] lub YYYYMMDDHHMMSS
+_TS_FOLDER_RE = re.compile(r'\d{4}-\d{2}-\d{2}(?:[-_]\d{2}[-_]\d{2}[-_]\d{2})?|\d{14}')
+_is_ts_folder_name = _TS_FOLDER_RE.fullmatch
+_DATA_URL_RE = re.compile(r'data:image/[A-Za-z0-9.+-]+;base64,')
+REPORT_PREFIXES = ("HWEL", "BTLD", "SWFL")
+_REPORT_PREFIX_RE = re.compile('|'.join(REPORT_PREFIXES), re.IGNORECASE)
+_ASCII_UPPER = str.maketrans(string.ascii_lowercase, string.ascii_uppercase)
+
+
+@functools.lru_cache(maxsize=8192)
 def canon_hex(s):
     if not s:
         return ""
-    only = re.sub(r'[^0-9A-F]', '', str(s).upper())
-    return ' '.join(a + b for a, b in zip(only[::2], only[1::2]))
+    only = _HEX_ONLY_RE.sub('', str(s).upper())
+    if len(only) & 1:
+        only = only[:-1]  # jak wcześniej zip(): nieparzysta końcówka jest pomijana
+    # `only` zawiera wyłącznie cyfry hex, więc fromhex nie może się nie udać
+    return bytes.fromhex(only).hex(' ').upper()
 
 
+@functools.lru_cache(maxsize=4096)
 def parse_id_to_hex(id_str):
     """Parse Settings ID format: PREFIX_0000XXXX_YYY.YYY.YYY -> returns HEX part"""
     if not id_str:
@@ -176,7 +316,7 @@ def parse_id_to_hex(id_str):
     if len(parts) < 3:
         return ""
     # Extract HEX part (last 4 chars)
-    mid = re.sub(r'[^0-9A-Fa-f]', '', parts[1])[-4:]
+    mid = _HEX_ONLY_ANYCASE_RE.sub('', parts[1])[-4:]
     # Extract DEC part
     dec_bytes = [f"{int(d):02X}" for d in parts[2].split('.') if d.isdigit()]
     # Combine HEX + DEC
@@ -201,14 +341,36 @@ def parse_id_components(id_str):
 def extract_bytes_from_teststep(t):
     if not t:
         return ""
-    match = re.search(r'([0-9A-F]{2}(?:\s*[0-9A-F]{2}){2,})', t, re.IGNORECASE)
+    match = _BYTES_RE.search(t.upper() if t.isascii() else t.translate(_ASCII_UPPER))
     return canon_hex(match.group(1)) if match else ""
 
 
+def extract_report_values(teststep_texts):
+    """Teksty teststepów -> {HWEL/BTLD/SWFL: bajty HEX}, jak dawne '.*(PREFIX.*)' (IGNORECASE) na złączonym tekście.
+
+    Teststepy są łączone spacją, a '.' nie obejmuje '\n' - liczy się pierwsza linia z prefiksem,
+    w niej jego ostatnie wystąpienie; bajty są szukane od prefiksu do końca tej linii.
+    """
+    all_text = " ".join(t for t in teststep_texts if t)
+    report_values = dict.fromkeys(REPORT_PREFIXES, "")
+    missing = set(REPORT_PREFIXES)
+    for line in all_text.split('\n'):
+        hits = {}
+        # One scan for all prefixes; later matches overwrite earlier ones (prefixes cannot overlap)
+        for m in _REPORT_PREFIX_RE.finditer(line):
+            prefix = m.group().upper()
+            if prefix in missing:
+                hits[prefix] = m.start()
+        for prefix, idx in hits.items():
+            report_values[prefix] = extract_bytes_from_teststep(line[idx:])
+            missing.discard(prefix)
+        if not missing:
+            break
+    return report_values
+
+
 def extract_date_from_name(file_path):
-    if not isinstance(file_path, Path):
-        file_path = Path(file_path)
-    match = re.search(r'_(\d{14})\.xml$', file_path.name)
+    match = _DATE_IN_NAME_RE.search(os.path.basename(file_path))
     if match:
         try:
             dt = datetime.strptime(match.group(1), '%Y%m%d%H%M%S')
@@ -220,16 +382,21 @@ def extract_date_from_name(file_path):
 
 def is_timestamp_folder(folder_name):
     """Sprawdza, czy nazwa folderu zawiera sensowny wzorzec daty/czasu."""
-    patterns = [
-        r'^\d{4}-\d{2}-\d{2}[-_]\d{2}[-_]\d{2}[-_]\d{2}$',
-        r'^\d{4}-\d{2}-\d{2}$',
-        r'^\d{4}\d{2}\d{2}\d{6}$'
-    ]
-    if folder_name and folder_name[0].isdigit():
-        for pattern in patterns:
-            if re.match(pattern, folder_name):
-                return True
-    return False
+    return bool(folder_name and folder_name[0].isdigit() and _is_ts_folder_name(folder_name))
+
+
+def find_latest_report(dmc_folder):
+    """Pierwszy plik XML z najnowszego folderu z datą w folderze DMC (albo None)."""
+    with os.scandir(dmc_folder) as it:
+        newest = max((e.name for e in it if is_timestamp_folder(e.name) and e.is_dir()), default=None)
+    if newest is None:
+        return None
+    # os.walk kończy się na pierwszym trafieniu - bez listowania całego poddrzewa
+    for root, _dirs, files in os.walk(os.path.join(dmc_folder, newest)):
+        for name in files:
+            if os.path.normcase(name).endswith('.xml'):
+                return Path(root) / name
+    return None
 
 
 # === CSV Logic ===
@@ -242,14 +409,195 @@ CSV_HEADER = [
 ]
 
 
+CSV_BATCH_MAX = 64  # maksymalna liczba wierszy zapisywanych jednym flush()
+CSV_FLUSH_TIMEOUT = 10.0  # s - maksymalne czekanie endpointów na zapis kolejki
+_csv_state = {"path": None, "fh": None, "writer": None}
+_csv_queue = queue.Queue()  # (ścieżka CSV, wiersz); None = zakończ wątek zapisu
+
+
+def _get_csv_writer(csv_path):
+    """Zwraca csv.writer na stale otwartym pliku wyników (wywołujący trzyma csv_lock)."""
+    csv_path = os.path.abspath(csv_path)
+    if _csv_state["fh"] is None or _csv_state["path"] != csv_path:
+        _close_csv()
+        os.makedirs(os.path.dirname(csv_path), exist_ok=True)
+        file_exists = os.path.exists(csv_path)
+        fh = open(csv_path, 'a', newline='', encoding='utf-8-sig', buffering=65536)
+        writer = csv.writer(fh)
+        if not file_exists:
+            writer.writerow(CSV_HEADER)
+        _csv_state.update(path=csv_path, fh=fh, writer=writer)
+    return _csv_state["writer"]
+
+
+def _flush_csv():
+    """Czeka, aż wątek zapisu opróżni kolejkę - potem plik zawiera wszystkie zalogowane wiersze.
+
+    Czekanie jest ograniczone (CSV_FLUSH_TIMEOUT) i przerywane, gdy wątek zapisu nie żyje -
+    endpointy nigdy nie wiszą na join()."""
+    deadline = time.monotonic() + CSV_FLUSH_TIMEOUT
+    with _csv_queue.all_tasks_done:
+        while _csv_queue.unfinished_tasks:
+            if not _csv_writer_thread.is_alive():
+                logging.error("CSV writer thread is not running - unwritten rows are skipped.")
+                return
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                logging.warning(f"CSV flush timed out after {CSV_FLUSH_TIMEOUT}s.")
+                return
+            _csv_queue.all_tasks_done.wait(min(remaining, 0.5))
+
+
+def _close_csv():
+    """Zamyka plik wyników, np. przed jego usunięciem (wywołujący trzyma csv_lock)."""
+    if _csv_state["fh"] is not None:
+        try:
+            _csv_state["fh"].close()
+        except Exception as e:
+            logging.error(f"CSV close error: {e}")
+    _csv_state.update(path=None, fh=None, writer=None)
+
+
+# Statystyki liczone przyrostowo przy zapisie wierszy; STATS_FILE pamięta, do jakiego stanu
+# pliku CSV (ścieżka, mtime_ns, size) się odnoszą. Dostęp pod csv_lock.
+_stats_state = {"data": None}
+
+
+def _empty_stats():
+    return {"total_ok": 0, "total_nok": 0, "nok_details": {}, "last_result": "N/A",
+            "last_timestamp": "N/A"}
+
+
+def _apply_stats_row(stats, row):
+    """Dolicza jeden wiersz historii (dict jak z csv.DictReader) do statystyk."""
+    final = row.get('final')
+    if final == 'OK':
+        stats['total_ok'] += 1
+    elif final == 'NOK':
+        stats['total_nok'] += 1
+        details = stats['nok_details']
+        for field in ('HWEL', 'BTLD', 'SWFL'):
+            key = field.lower()
+            if row.get(key + '_report') != row.get(key + '_set'):
+                details[field] = details.get(field, 0) + 1
+    stats['last_result'] = row.get('final', 'N/A')
+    stats['last_timestamp'] = row.get('timestamp', 'N/A')
+
+
+def _csv_stamp(csv_path):
+    try:
+        st = os.stat(csv_path)
+        return [st.st_mtime_ns, st.st_size]
+    except OSError:
+        return None
+
+
+def _load_stats_file():
+    """Zawartość STATS_FILE z pamięci albo z dysku (wywołujący trzyma csv_lock)."""
+    if _stats_state["data"] is None and STATS_FILE.exists():
+        try:
+            with open(STATS_FILE, 'rb') as f:
+                _stats_state["data"] = _json_loads(f.read())
+        except Exception as e:
+            logging.error(f"Could not read {STATS_FILE.name}: {e}")
+    return _stats_state["data"]
+
+
+def _store_stats(csv_path, stats):
+    """Zapisuje statystyki dla bieżącego stanu pliku CSV (wywołujący trzyma csv_lock)."""
+    data = {"csv": csv_path, "stamp": _csv_stamp(csv_path), "stats": stats}
+    _stats_state["data"] = data
+    try:
+        tmp_file = STATS_FILE.with_suffix('.json.tmp')
+        with open(tmp_file, 'wb') as f:
+            f.write(_json_line(data))
+        os.replace(tmp_file, STATS_FILE)
+    except Exception as e:
+        logging.error(f"Could not save {STATS_FILE.name}: {e}")
+
+
+def _cached_stats(csv_path, stamp):
+    """Statystyki z STATS_FILE, jeśli dotyczą dokładnie tego stanu pliku; inaczej None."""
+    data = _load_stats_file()
+    if data and data.get("csv") == csv_path and data.get("stamp") == stamp:
+        return data["stats"]
+    return None
+
+
+def _update_stats(csv_path, stamp_before, rows):
+    """Dolicza nowo zapisane wiersze; bez znanego stanu wyjściowego get_stats przeliczy całość."""
+    if stamp_before is None:
+        stats = _empty_stats()  # plik dopiero powstał
+    else:
+        stats = _cached_stats(csv_path, stamp_before)
+        if stats is None:
+            return
+    for row in rows:
+        _apply_stats_row(stats, dict(zip(CSV_HEADER, ('' if v is None else str(v) for v in row))))
+    _store_stats(csv_path, stats)
+
+
+def _csv_writer_loop():
+    """Jedyny wątek piszący do CSV: zbiera wiersze z kolejki w paczki i zapisuje je jednym flush()."""
+    while True:
+        batch = [_csv_queue.get()]
+        try:
+            while len(batch) < CSV_BATCH_MAX and batch[-1] is not None:
+                batch.append(_csv_queue.get_nowait())
+        except queue.Empty:
+            pass
+
+        # Wszystko w try - wyjątek nie może zabić jedynego wątku zapisu ani pominąć task_done()
+        try:
+            pending = {}
+            for item in batch:
+                if item is not None:
+                    try:
+                        pending.setdefault(os.path.abspath(item[0]), []).append(item[1])
+                    except Exception as e:
+                        logging.error(f"CSV write error (invalid path {item[0]!r}): {e}")
+
+            with csv_lock:
+                for csv_path, rows in pending.items():
+                    try:
+                        stamp_before = _csv_stamp(csv_path)
+                        _get_csv_writer(csv_path).writerows(rows)
+                        _csv_state["fh"].flush()
+                        _update_stats(csv_path, stamp_before, rows)
+                    except Exception as e:
+                        logging.error(f"CSV write error ({csv_path}): {e}")
+        except Exception as e:
+            logging.error(f"CSV write error: {e}")
+        finally:
+            for _ in batch:
+                _csv_queue.task_done()
+
+        if batch[-1] is None:
+            return
+
+
+_csv_writer_thread = threading.Thread(target=_csv_writer_loop, name="sc-csv", daemon=True)
+_csv_writer_thread.start()
+
+
+def _shutdown_csv():
+    _csv_queue.put(None)
+    _csv_writer_thread.join(timeout=5)
+    with csv_lock:
+        _close_csv()
+
+
+atexit.register(_shutdown_csv)
+
+
 def log_to_csv(csv_path_str, data):
+    """Buduje wiersz i kolejkuje go do zapisu - nie blokuje wywołującego."""
     if not csv_path_str:
         return
     try:
-        csv_path = Path(csv_path_str)
-        if csv_path.is_dir():
-            csv_path = csv_path / "results.csv"
-        csv_path.parent.mkdir(parents=True, exist_ok=True)
+        csv_path = os.fspath(csv_path_str)  # csvPath z configu może mieć dowolny typ JSON
+        if os.path.isdir(csv_path):
+            csv_path = os.path.join(csv_path, "results.csv")
         
         results = {r['Field']: r for r in data['results']}
         row = [
@@ -260,24 +608,72 @@ def log_to_csv(csv_path_str, data):
             results.get('SWFL', {}).get('Report', ''), results.get('SWFL', {}).get('Settings', ''),
             str(data.get('reportFile', 'N/A')), str(data.get('settingsFile', 'N/A'))
         ]
-        
-        with csv_lock:
-            file_exists = csv_path.exists()
-            with open(csv_path, 'a', newline='', encoding='utf-8-sig') as f:
-                writer = csv.writer(f)
-                if not file_exists:
-                    writer.writerow(CSV_HEADER)
-                writer.writerow(row)
+        _csv_queue.put((csv_path, row))
     except Exception as e:
         logging.error(f"CSV write error: {e}")
 
 
-# === Manual Scans Log ===
+# === Recent Checks Logs (JSON Lines, najnowszy wpis na końcu) ===
 MAX_MANUAL_SCANS = 10
+MAX_PDI_CHECKS = 10
+RECENT_LOG_MAX_BYTES = 64 * 1024  # powyżej tego rozmiaru plik jest przycinany do ostatnich wpisów
+
+
+def _append_recent_log(log_file, entry, max_entries):
+    """Dopisuje wpis jako jedną linię JSON (wywołujący trzyma lock danego logu)."""
+    with open(log_file, 'ab') as f:
+        f.write(_json_line(entry))
+        size = f.tell()
+
+    # Próg rozmiaru pliku (nie licznik w pamięci) - działa też przez kolejne uruchomienia
+    if size > RECENT_LOG_MAX_BYTES:
+        with open(log_file, 'rb') as f:
+            tail = deque(f, maxlen=max_entries)
+        with open(log_file, 'wb') as f:
+            f.writelines(tail)
+
+
+_recent_log_cache = {}  # plik logu -> ((mtime_ns, size), wpisy); dostęp pod lockiem danego logu
+
+
+def _read_recent_log(log_file, max_entries):
+    """Zwraca ostatnie wpisy z logu JSON Lines, najnowsze pierwsze (bez ponownego parsowania niezmienionego pliku)."""
+    try:
+        st = os.stat(log_file)
+    except FileNotFoundError:
+        return []
+    key = (st.st_mtime_ns, st.st_size)
+    cached = _recent_log_cache.get(log_file)
+    if cached is None or cached[0] != key:
+        with open(log_file, 'rb') as f:
+            tail = deque(f, maxlen=max_entries)
+        cached = (key, [_json_loads(line) for line in reversed(tail) if line.strip()])
+        _recent_log_cache[log_file] = cached
+    return list(cached[1])
+
+
+def _migrate_legacy_log(legacy_file, log_file):
+    """Konwertuje stary log (lista JSON, najnowszy pierwszy) do formatu JSON Lines."""
+    if not legacy_file.exists() or log_file.exists():
+        return
+    try:
+        with open(legacy_file, 'rb') as f:
+            entries = _json_loads(f.read())
+        with open(log_file, 'wb') as f:
+            f.writelines(_json_line(e) for e in reversed(entries))
+        os.remove(legacy_file)
+        logging.info(f"Migrated {legacy_file.name} -> {log_file.name}")
+    except Exception as e:
+        logging.error(f"Log migration error ({legacy_file.name}): {e}")
 
 
+_migrate_legacy_log(LEGACY_MANUAL_SCAN_LOG_FILE, MANUAL_SCAN_LOG_FILE)
+_migrate_legacy_log(LEGACY_PDI_CHECK_LOG_FILE, PDI_CHECK_LOG_FILE)
+
+
+# === Manual Scans Log ===
 def log_manual_scan(data):
-    """Zapisuje ostatni ręczny skan do dedykowanego pliku JSON."""
+    """Zapisuje ostatni ręczny skan do dedykowanego pliku JSON Lines."""
     try:
         data_to_log = {
             "timestamp": datetime.now().strftime("%Y-%m-%d %H:%M:%S"),
@@ -291,34 +687,24 @@ def log_manual_scan(data):
         }
 
         with manual_scan_lock:
-            scans = _get_recent_manual_scans()
-            scans.insert(0, data_to_log)
-            scans = scans[:MAX_MANUAL_SCANS]
-
-            with open(MANUAL_SCAN_LOG_FILE, 'w', encoding='utf-8') as f:
-                json.dump(scans, f, indent=2)
+            _append_recent_log(MANUAL_SCAN_LOG_FILE, data_to_log, MAX_MANUAL_SCANS)
     except Exception as e:
         logging.error(f"Manual scan log error: {e}")
 
 
 def _get_recent_manual_scans():
-    """Wczytuje listę ostatnich skanów z pliku JSON."""
-    if not MANUAL_SCAN_LOG_FILE.exists():
-        return []
+    """Wczytuje listę ostatnich skanów z pliku JSON Lines."""
     try:
-        with open(MANUAL_SCAN_LOG_FILE, 'r', encoding='utf-8') as f:
-            return json.load(f)
+        with manual_scan_lock:
+            return _read_recent_log(MANUAL_SCAN_LOG_FILE, MAX_MANUAL_SCANS)
     except Exception as e:
         logging.error(f"Error reading manual scans log: {e}")
         return []
 
 
 # === PDI Check Log ===
-MAX_PDI_CHECKS = 10
-
-
 def log_pdi_check(data):
-    """Zapisuje ostatni PDI check do dedykowanego pliku JSON."""
+    """Zapisuje ostatni PDI check do dedykowanego pliku JSON Lines."""
     try:
         data_to_log = {
             "timestamp": datetime.now().strftime("%Y-%m-%d %H:%M:%S"),
@@ -331,23 +717,16 @@ def log_pdi_check(data):
         }
 
         with pdi_check_lock:
-            checks = _get_recent_pdi_checks()
-            checks.insert(0, data_to_log)
-            checks = checks[:MAX_PDI_CHECKS]
-
-            with open(PDI_CHECK_LOG_FILE, 'w', encoding='utf-8') as f:
-                json.dump(checks, f, indent=2)
+            _append_recent_log(PDI_CHECK_LOG_FILE, data_to_log, MAX_PDI_CHECKS)
     except Exception as e:
         logging.error(f"PDI check log error: {e}")
 
 
 def _get_recent_pdi_checks():
-    """Wczytuje listę ostatnich PDI checks z pliku JSON."""
-    if not PDI_CHECK_LOG_FILE.exists():
-        return []
+    """Wczytuje listę ostatnich PDI checks z pliku JSON Lines."""
     try:
-        with open(PDI_CHECK_LOG_FILE, 'r', encoding='utf-8') as f:
-            return json.load(f)
+        with pdi_check_lock:
+            return _read_recent_log(PDI_CHECK_LOG_FILE, MAX_PDI_CHECKS)
     except Exception as e:
         logging.error(f"Error reading PDI checks log: {e}")
         return []
@@ -357,131 +736,546 @@ def _get_recent_pdi_checks():
 OUTLOOK_WAIT_SECONDS = 15
 OUTLOOK_POLL_INTERVAL = 1
 
+# COM proxies are bound to the thread that created them, so all e-mail work runs on one
+# dedicated thread which owns the cached Outlook Application handle.
+_outlook_state = {"app": None}
+_mail_pool = ThreadPoolExecutor(max_workers=1, thread_name_prefix="sc-mail",
+                                initializer=pythoncom.CoInitialize if pythoncom else None)
+atexit.register(_mail_pool.shutdown, wait=False)
+
+
+def _connect_outlook():
+    try:
+        return win32.GetActiveObject('outlook.application')
+    except pywintypes.com_error:
+        try:
+            os.startfile("outlook")
+            for i in range(OUTLOOK_WAIT_SECONDS):
+                time.sleep(OUTLOOK_POLL_INTERVAL)
+                try:
+                    return win32.GetActiveObject('outlook.application')
+                except pywintypes.com_error:
+                    continue
+            logging.error(f"Outlook connection timeout ({OUTLOOK_WAIT_SECONDS}s)")
+            return None
+        except Exception as e:
+            logging.error(f"Outlook start failed: {e}")
+            return None
+    except Exception as e:
+        logging.error(f"Outlook error: {e}")
+        return None
+
 
 def get_outlook_app():
-    global win32, pywintypes
+    """Zwraca zapamiętany obiekt Outlook; łączy się ponownie tylko gdy go brak."""
     if win32 is None:
         return None
 
     with outlook_lock:
-        try:
-            return win32.GetActiveObject('outlook.application')
-        except pywintypes.com_error:
-            try:
-                os.startfile("outlook")
-                for i in range(OUTLOOK_WAIT_SECONDS):
-                    time.sleep(OUTLOOK_POLL_INTERVAL)
-                    try:
-                        return win32.GetActiveObject('outlook.application')
-                    except pywintypes.com_error:
-                        continue
-                logging.error(f"Outlook connection timeout ({OUTLOOK_WAIT_SECONDS}s)")
-                return None
-            except Exception as e:
-                logging.error(f"Outlook start failed: {e}")
-                return None
-        except Exception as e:
-            logging.error(f"Outlook error: {e}")
-            return None
+        if _outlook_state["app"] is None:
+            _outlook_state["app"] = _connect_outlook()
+        return _outlook_state["app"]
 
 
-def send_nok_email(recipients, data):
-    if not recipients:
-        return
-    try:
-        outlook = get_outlook_app()
-        if not outlook:
-            return
-        
-        snr = data.get('snr', 'N/A')
-        dmc = data.get('dmc', 'N/A')
-        
-        rows = []
-        for r in data.get('results', []):
-            style = "color: red; font-weight: bold;" if r['Result'] == 'NOK' else "color: green;"
-            rows.append(f"<tr><td>{r['Field']}</td><td>{r.get('Report', 'N/A')}</td><td>{r.get('Settings', 'N/A')}</td><td style='{style}'>{r['Result']}</td></tr>")
-        
-        body = f"""
+# Wartości z raportów/ustawień są escapowane - trafiają do HTML maila
+NOK_EMAIL_TEMPLATE = """
         <html><body>
         <p>A <strong>NOK</strong> result was detected.</p>
-        <p><strong>SNR:</strong> {snr}<br><strong>DMC:</strong> {dmc}</p>
+        <p><strong>SNR:</strong> %(snr)s<br><strong>DMC:</strong> %(dmc)s</p>
         <table border='1' cellpadding='5' cellspacing='0' style='border-collapse: collapse;'>
         <tr style='background-color: #f2f2f2;'><th>Field</th><th>Report</th><th>Settings</th><th>Result</th></tr>
-        {''.join(rows)}
+        %(rows)s
         </table>
-        <p><strong>Report:</strong> {data.get('reportFile', 'N/A')}<br><strong>Settings:</strong> {data.get('settingsFile', 'N/A')}</p>
+        <p><strong>Report:</strong> %(report)s<br><strong>Settings:</strong> %(settings)s</p>
         </body></html>
         """
-        
-        mail = outlook.CreateItem(0)
-        mail.To = "; ".join(recipients)
-        mail.Subject = f"[SoftwareChecker] NOK - SNR {snr}"
-        mail.HTMLBody = body
-        mail.Send()
+_NOK_STYLE = "color: red; font-weight: bold;"
+_OK_STYLE = "color: green;"
+
+
+def send_nok_email(recipients, data):
+    if not recipients:
+        return
+    try:
+        snr = data.get('snr', 'N/A')
+        dmc = data.get('dmc', 'N/A')
+
+        parts = []
+        append = parts.append
+        for r in data.get('results', ()):
+            res = r['Result']
+            style = _NOK_STYLE if res == 'NOK' else _OK_STYLE
+            append(f"<tr><td>{escape(str(r['Field']))}</td><td>{escape(str(r.get('Report', 'N/A')))}</td>"
+                   f"<td>{escape(str(r.get('Settings', 'N/A')))}</td><td style='{style}'>{escape(str(res))}</td></tr>")
+
+        body = NOK_EMAIL_TEMPLATE % {
+            "snr": escape(str(snr)),
+            "dmc": escape(str(dmc)),
+            "rows": ''.join(parts),
+            "report": escape(str(data.get('reportFile', 'N/A'))),
+            "settings": escape(str(data.get('settingsFile', 'N/A'))),
+        }
+
+        for attempt in (1, 2):
+            outlook = get_outlook_app()
+            if not outlook:
+                return
+            try:
+                mail = outlook.CreateItem(0)
+                mail.To = "; ".join(recipients)
+                mail.Subject = f"[SoftwareChecker] NOK - SNR {snr}"
+                mail.HTMLBody = body
+                mail.Send()
+                break
+            except pywintypes.com_error as e:
+                # Cached handle went stale (e.g. Outlook was restarted) - reconnect once
+                _outlook_state["app"] = None
+                if attempt == 2:
+                    raise
+                logging.warning(f"Outlook COM error, reconnecting: {e}")
         logging.info(f"Email sent for SNR {snr}")
     except Exception as e:
         logging.error(f"Email send error: {e}")
 
 
 # === Config Management ===
+_config_cache = {"key": None, "value": None, "lock": threading.Lock()}
+
+
+def _invalidate_config_cache():
+    with _config_cache["lock"]:
+        _config_cache["key"] = None
+        _config_cache["value"] = None
+
+
+@functools.lru_cache(maxsize=32)
+def _config_path(path_str):
+    """Path dla ścieżki z configu - tworzony raz na wartość (Path jest niemutowalny, można współdzielić)."""
+    return Path(path_str) if path_str else None
+
+
+def _store_config_cache(config):
+    """Po zapisie: cache od razu zawiera nową konfigurację (bez ponownego czytania pliku)."""
+    try:
+        st = os.stat(CONFIG_FILE)
+    except OSError:
+        _invalidate_config_cache()
+        return
+    with _config_cache["lock"]:
+        _config_cache["key"] = (st.st_mtime_ns, st.st_size)
+        _config_cache["value"] = copy.deepcopy(config)
+
+
 def load_config_from_file():
-    config = DEFAULT_CONFIG.copy()
-    if not CONFIG_FILE.exists():
-        return config
+    """Wczytuje config.json; sparsowana wersja jest cache'owana do czasu zmiany pliku (mtime_ns + rozmiar)."""
+    try:
+        st = os.stat(CONFIG_FILE)
+    except FileNotFoundError:
+        return copy.deepcopy(DEFAULT_CONFIG)
+    stamp = (st.st_mtime_ns, st.st_size)
+
+    with _config_cache["lock"]:
+        if _config_cache["key"] == stamp and _config_cache["value"] is not None:
+            # deepcopy - wywołujący mogą modyfikować np. listę mailRecipients
+            return copy.deepcopy(_config_cache["value"])
+
+        config = copy.deepcopy(DEFAULT_CONFIG)
+        try:
+            with open(CONFIG_FILE, 'rb') as f:
+                saved_config = _json_loads(f.read())
+
+            for key in config.keys():
+                if key in saved_config:
+                    config[key] = saved_config[key]
+
+        except Exception as e:
+            logging.error(f"Critical error loading config.json: {e}")
+            return copy.deepcopy(DEFAULT_CONFIG)
+
+        _config_cache["key"] = stamp
+        _config_cache["value"] = config
+        return copy.deepcopy(config)
+
+
+# === Settings Index (SNR -> newest settings XML) ===
+_settings_index = {
+    "folder": None,
+    "snapshot": {},        # xml path -> (mtime_ns, size)
+    "file_snrs": {},       # xml path -> SNRs found in that file
+    "snr_map": {},         # snr -> (xml path, (mtime_ns, size)) of the newest file containing it
+    "observer": None,      # shared Observer when the current folder is watched, else None
+    "dirty": True,         # set by the watcher on any change in the folder
+    "walked_at": 0.0,      # time.monotonic() of the last full walk
+    "lock": threading.Lock(),
+}
+SETTINGS_SCAN_WORKERS = min(8, (os.cpu_count() or 1) * 2)
+# Safety net for shares where change notifications get lost - re-walk at least this often
+SETTINGS_WALK_MAX_AGE = 60
+SETTINGS_XML_MIN_SIZE = 128         # bytes
+SETTINGS_XML_MAX_SIZE = 20_000_000  # bytes
+
+
+class _SettingsChangeHandler(FileSystemEventHandler):
+    """Każda zmiana w folderze Settings unieważnia indeks (przebudowa przy następnym zapytaniu)."""
+
+    def on_any_event(self, event):
+        if event.event_type in ('created', 'deleted', 'moved'):
+            _settings_index["dirty"] = True
+        elif event.event_type == 'modified' and self._content_changed(event):
+            _settings_index["dirty"] = True
+
+    @staticmethod
+    def _content_changed(event):
+        """'modified' przychodzi też dla katalogów i samych odczytów (LAST_ACCESS na Windows) -
+        liczy się tylko plik XML, którego (mtime_ns, size) różni się od snapshotu indeksu."""
+        path = os.fsdecode(event.src_path)
+        if event.is_directory or not path.lower().endswith('.xml'):
+            return False
+        try:
+            st = os.stat(path)
+        except OSError:
+            return True
+        return _settings_index["snapshot"].get(path) != (st.st_mtime_ns, st.st_size)
+
+
+# Jeden wątek Observer i jeden handler na cały proces - zmiana folderu tylko przepina obserwację
+_settings_watch = {"observer": None, "handler": _SettingsChangeHandler()}
+
+
+def _watch_settings_folder(folder):
+    """Przełącza obserwatora na folder Settings. Zwraca None gdy watchdog niedostępny."""
+    if not WATCHDOG_AVAILABLE:
+        return None
     try:
-        with open(CONFIG_FILE, 'r', encoding='utf-8') as f:
-            saved_config = json.load(f)
+        observer = _settings_watch["observer"]
+        if observer is None or not observer.is_alive():
+            observer = _settings_watch["observer"] = Observer()
+            observer.start()
+        else:
+            observer.unschedule_all()
+        observer.schedule(_settings_watch["handler"], folder, recursive=True)
+    except Exception as e:
+        logging.warning(f"[Index] Cannot watch {folder}, falling back to re-scanning: {e}")
+        return None
+    return observer
+
+
+def _stop_settings_watch():
+    if _settings_watch["observer"] is not None:
+        _settings_watch["observer"].stop()
+
+
+atexit.register(_stop_settings_watch)
+
+
+def _walk_xml_with_stamp(root):
+    """Iteracyjny spacer os.scandir - zwraca (ścieżka, (mtime_ns, rozmiar)) dla każdego pliku XML w drzewie."""
+    stack = [root]
+    while stack:
+        try:
+            it = os.scandir(stack.pop())
+        except OSError:
+            continue
+        with it:
+            while True:
+                try:
+                    entry = next(it)
+                except StopIteration:
+                    break
+                except OSError:
+                    break  # błąd odczytu katalogu - dalszych wpisów i tak nie da się pobrać
+                # Błąd jednego wpisu (usunięty w trakcie, brak uprawnień) pomija tylko ten wpis
+                try:
+                    if entry.is_dir(follow_symlinks=False):
+                        stack.append(entry.path)
+                        continue
+                    if not (entry.is_file(follow_symlinks=False) and entry.name.lower().endswith('.xml')):
+                        continue
+                    st = entry.stat()
+                except OSError:
+                    continue
+                # Pomija puste/śmieciowe i przypadkowo wrzucone ogromne pliki (archiwa, logi)
+                if SETTINGS_XML_MIN_SIZE <= st.st_size <= SETTINGS_XML_MAX_SIZE:
+                    yield entry.path, (st.st_mtime_ns, st.st_size)
+
+
+def _contains_hardware_tag(xml_path):
+    """Szybki test bajtowy (mmap + memmem) przed parsowaniem - pliki bez <hardware> są pomijane."""
+    with open(xml_path, 'rb') as fh:
+        try:
+            with mmap.mmap(fh.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+                # UTF-16 (BOM) nie da się sprawdzić bajtowo - takie pliki zawsze idą do parsera
+                return mm[:2] in (b'\xff\xfe', b'\xfe\xff') or mm.find(b'<hardware') >= 0
+        except ValueError:  # pusty plik nie daje się zmapować
+            return False
+
+
+def _read_snrs(xml_path):
+    """Zwraca zbiór SNR ze wszystkich <hardware> w pliku albo None, gdy pliku nie udało się odczytać.
+
+    None (brak dostępu, blokada pliku, niedokończony zapis, uszkodzony XML) nie trafia do indeksu -
+    plik jest sprawdzany ponownie przy kolejnym odświeżeniu."""
+    try:
+        if not _contains_hardware_tag(xml_path):
+            return set()
+        # Strumieniowo - w pamięci jest tylko bieżący <hardware>, nie całe drzewo
+        snrs = set()
+        for _, hw in ET.iterparse(xml_path, events=('end',), tag='hardware', resolve_entities=False):
+            snr = hw.get('snr')
+            if snr:
+                snrs.add(snr)
+            hw.clear()
+            while hw.getprevious() is not None:
+                del hw.getparent()[0]
+        return snrs
+    except Exception as e:
+        logging.warning(f"[Index] Could not read {xml_path}, will retry: {e}")
+        return None
+
+
+def _load_persisted_index(folder):
+    """Wczytuje zapisany indeks (snapshot, file_snrs) - tylko jeśli dotyczy tego samego folderu."""
+    try:
+        with open(SETTINGS_INDEX_FILE, 'rb') as f:
+            data = _json_loads(f.read())
+        if data.get("folder") != folder:
+            return {}, {}
+        snapshot = {p: tuple(stamp) for p, stamp in data["snapshot"].items()}
+        file_snrs = {p: set(snrs) for p, snrs in data["file_snrs"].items() if p in snapshot}
+        return snapshot, file_snrs
+    except FileNotFoundError:
+        return {}, {}
+    except Exception as e:
+        logging.warning(f"[Index] Ignoring unreadable {SETTINGS_INDEX_FILE.name}: {e}")
+        return {}, {}
+
+
+# Zapisy indeksu idą przez _bg_pool - lock serializuje je (wspólny plik .tmp),
+# a numer kolejny pilnuje, żeby starszy stan nie nadpisał nowszego
+_index_save = {"seq": 0, "written": 0, "lock": threading.Lock()}
+
+
+def _save_persisted_index(data, seq):
+    with _index_save["lock"]:
+        if seq <= _index_save["written"]:
+            return
+        try:
+            tmp_file = SETTINGS_INDEX_FILE.with_suffix('.json.tmp')
+            with open(tmp_file, 'wb') as f:
+                f.write(_json_line(data))
+            os.replace(tmp_file, SETTINGS_INDEX_FILE)
+            _index_save["written"] = seq
+        except Exception as e:
+            logging.error(f"[Index] Could not save {SETTINGS_INDEX_FILE.name}: {e}")
+
+
+def _refresh_settings_index(settings_folder):
+    """Synchronizuje indeks SNR z folderem Settings - parsuje tylko nowe lub zmienione pliki XML."""
+    # Jedna postać ścieżki niezależnie od źródła (config jako str, Path, '/' z tkinter, końcowy separator)
+    folder = os.path.abspath(os.fspath(settings_folder))
+    folder_key = os.path.normcase(folder)
+    with _settings_index["lock"]:
+        if _settings_index["folder"] != folder_key:
+            # Start from the index saved by the previous run - only files changed since then get parsed
+            snapshot, file_snrs = _load_persisted_index(folder_key)
+            _settings_index.update(folder=folder_key, snapshot=snapshot, file_snrs=file_snrs, snr_map=None)
+            _settings_index["observer"] = _watch_settings_folder(folder)
+        elif (_settings_index["observer"] is not None and not _settings_index["dirty"]
+              and time.monotonic() - _settings_index["walked_at"] < SETTINGS_WALK_MAX_AGE):
+            # Watcher reported no changes since the last walk - no syscalls needed
+            return _settings_index["snr_map"]
+
+        # Cleared before walking, so an event arriving mid-walk triggers another pass
+        _settings_index["dirty"] = False
+        _settings_index["walked_at"] = time.monotonic()
+        snapshot = dict(_walk_xml_with_stamp(folder))
+
+        old_snapshot = _settings_index["snapshot"]
+        # (mtime_ns, size) also catches rewrites within the filesystem's mtime granularity
+        changed = [p for p, stamp in snapshot.items() if old_snapshot.get(p) != stamp]
+        if not changed and len(old_snapshot) == len(snapshot) and _settings_index["snr_map"] is not None:
+            return _settings_index["snr_map"]
+
+        file_snrs = _settings_index["file_snrs"]
+        removed = old_snapshot.keys() - snapshot.keys()
+        for xml_path in removed:
+            file_snrs.pop(xml_path, None)
+        if len(changed) > 1:
+            # lxml releases the GIL while reading/parsing, so the cold build scales with threads
+            with ThreadPoolExecutor(max_workers=SETTINGS_SCAN_WORKERS, thread_name_prefix="sc-scan") as pool:
+                results = list(zip(changed, pool.map(_read_snrs, changed)))
+        else:
+            results = [(xml_path, _read_snrs(xml_path)) for xml_path in changed]
+
+        parsed = 0
+        for xml_path, snrs in results:
+            if snrs is None:
+                # Failed read: keep the previous entry (or none) so the next refresh retries the file
+                if xml_path in old_snapshot:
+                    snapshot[xml_path] = old_snapshot[xml_path]
+                else:
+                    del snapshot[xml_path]
+                continue
+            file_snrs[xml_path] = snrs
+            parsed += 1
+
+        # Oldest first, so the newest file containing an SNR wins
+        snr_map = {}
+        for xml_path in sorted(file_snrs, key=snapshot.get):
+            for snr in file_snrs[xml_path]:
+                snr_map[snr] = (xml_path, snapshot[xml_path])
+
+        _settings_index["snapshot"] = snapshot
+        _settings_index["snr_map"] = snr_map
+        logging.info(f"[Index] Re-parsed {parsed} of {len(snapshot)} XML files, {len(snr_map)} SNRs indexed.")
+        if parsed or removed:
+            _index_save["seq"] += 1  # pod _settings_index["lock"] - kolejność jak kolejność odświeżeń
+            _bg_pool.submit(_save_persisted_index, {
+                "folder": folder_key,
+                "snapshot": snapshot,
+                "file_snrs": {p: sorted(snrs) for p, snrs in file_snrs.items()},
+            }, _index_save["seq"])
+        return snr_map
+
+
+def warm_settings_index(settings_folder):
+    """Buduje indeks w tle (start serwera / zmiana folderu), żeby pierwszy check nie czekał na skan."""
+    if settings_folder and os.path.isdir(settings_folder):
+        _bg_pool.submit(_refresh_settings_index, settings_folder)
+
+
+def _find_hardware_by_snr(xml_path, snr):
+    """Strumieniowo parsuje plik Settings i zwraca węzeł <hardware snr=...> (przerywa przy pierwszym trafieniu)."""
+    for _, elem in ET.iterparse(os.fspath(xml_path), events=('end',), tag='hardware', resolve_entities=False):
+        if elem.get('snr') == snr:
+            return elem
+        elem.clear()
+        while elem.getprevious() is not None:
+            del elem.getparent()[0]
+    return None
+
+
+# LRU (plik, SNR) -> węzeł <hardware>; ważny dopóki plik ma ten sam (mtime_ns, rozmiar)
+HARDWARE_CACHE_SIZE = 256
+_hardware_cache = OrderedDict()
+_hardware_cache_lock = threading.Lock()
+
+
+def _get_hardware_node(xml_path, snr):
+    st = os.stat(xml_path)
+    key, stamp = (xml_path, snr), (st.st_mtime_ns, st.st_size)
+    with _hardware_cache_lock:
+        hit = _hardware_cache.get(key)
+        if hit is not None and hit[0] == stamp:
+            _hardware_cache.move_to_end(key)
+            return hit[1]
+
+    node = _find_hardware_by_snr(xml_path, snr)
+    if node is not None:
+        with _hardware_cache_lock:
+            _hardware_cache[key] = (stamp, node)
+            _hardware_cache.move_to_end(key)
+            if len(_hardware_cache) > HARDWARE_CACHE_SIZE:
+                _hardware_cache.popitem(last=False)
+    return node
+
+
+def _lookup_indexed(settings_folder, snr):
+    entry = _refresh_settings_index(settings_folder).get(snr)
+    if entry:
+        node = _get_hardware_node(entry[0], snr)
+        if node is not None:
+            return Path(entry[0]), node
+    return None, None
+
+
+def _scan_settings_for_snr(settings_folder, snr):
+    """Bezpośredni skan bez indeksu: pliki od najnowszego, pierwszy z <hardware snr=...> wygrywa."""
+    files = sorted(_walk_xml_with_stamp(os.path.abspath(os.fspath(settings_folder))),
+                   key=lambda item: item[1], reverse=True)
+    for xml_path, _ in files:
+        try:
+            if not _contains_hardware_tag(xml_path):
+                continue
+            node = _find_hardware_by_snr(xml_path, snr)
+        except Exception as e:
+            logging.warning(f"[Core] Direct scan could not read {xml_path}: {e}")
+            continue
+        if node is not None:
+            return Path(xml_path), node
+    return None, None
+
 
-        for key in config.keys():
-            if key in saved_config:
-                config[key] = saved_config[key]
+def _find_settings_for_snr(settings_folder, snr):
+    """Wspólne wyszukiwanie dla Manual i PDI Check: zwraca (plik Settings, węzeł <hardware>) lub (None, None).
 
+    Najpierw indeks; przy braku lub błędzie - odświeżenie indeksu z pełnym przejściem folderu,
+    a na końcu bezpośredni skan plików (jak przed wprowadzeniem indeksu)."""
+    for attempt in range(2):
+        try:
+            settings_file, node = _lookup_indexed(settings_folder, snr)
+            if node is not None:
+                return settings_file, node
+        except Exception as e:
+            logging.error(f"[Index] Lookup of SNR {snr} failed: {e}", exc_info=True)
+        # Indeks mógł przegapić zmianę - następne odświeżenie przejdzie folder od nowa
+        _settings_index["dirty"] = True
+
+    try:
+        settings_file, node = _scan_settings_for_snr(settings_folder, snr)
     except Exception as e:
-        logging.error(f"Critical error loading config.json: {e}")
-        return DEFAULT_CONFIG
-    return config
+        logging.error(f"[Core] Direct settings scan for SNR {snr} failed: {e}", exc_info=True)
+        return None, None
+    if node is not None:
+        logging.warning(f"[Index] SNR {snr} missing from index, found by direct scan in {settings_file}")
+    return settings_file, node
 
 
 # === GŁÓWNA LOGIKA MANUAL CHECK (z raportami XML) ===
+SNR_INFO_NAME = 'BMW PartNumber'
+
+
+def _scan_report(report_file):
+    """
+    Strumieniowo czyta raport: zwraca (SNR, teksty <teststep>) bez budowania całego drzewa.
+    SNR = <description> pierwszego <info> z <name>BMW PartNumber</name>. Teksty są zbierane do końca
+    pliku, bo przy powtórzonych prefiksach wygrywa ostatnie wystąpienie.
+    """
+    snr, snr_seen, texts = None, False, []
+    for _, elem in ET.iterparse(os.fspath(report_file), events=('end',), tag=('info', 'teststep'),
+                                resolve_entities=False):
+        if elem.tag == 'teststep':
+            texts.append(elem.text)
+        elif not snr_seen:
+            descs = _FIND_SNR_DESCRIPTION(elem, name=SNR_INFO_NAME)
+            if descs:
+                snr_seen, snr = True, descs[0].text
+        elem.clear()
+        while elem.getprevious() is not None:
+            del elem.getparent()[0]
+    return snr, texts
+
+
 def process_core_logic(report_file_path, settings_folder_str, dmc_code):
     try:
         report_file = Path(report_file_path)
-        settings_folder = Path(settings_folder_str)
-        if not (report_file.exists() and settings_folder.is_dir()):
+        settings_folder = _config_path(settings_folder_str)
+        if not (settings_folder and report_file.exists() and settings_folder.is_dir()):
             return {"success": False, "error": "msgPathsNotSet", "dmc": dmc_code}
 
-        tree = ET.parse(str(report_file), SECURE_PARSER)
-        root = tree.getroot()
-        snr_node = root.find(".//info[name='BMW PartNumber']/description")
-        snr = snr_node.text if snr_node is not None else None
+        snr, teststep_texts = _scan_report(report_file)
         if not snr:
             return {"success": False, "error": "msgSnrNotFound", "dmc": dmc_code, "reportFile": str(report_file)}
 
-        all_text = " ".join(node.text for node in root.findall(".//teststep") if node.text)
-        report_values = {}
-        for prefix in ["HWEL", "BTLD", "SWFL"]:
-            match = re.search(rf'.*({prefix}.*)', all_text, re.IGNORECASE)
-            report_values[prefix] = extract_bytes_from_teststep(match.group(1) if match else None)
+        report_values = extract_report_values(teststep_texts)
 
-        logging.info(f"[Core] Searching for SNR: {snr} in {settings_folder}")
+        logging.debug(f"[Core] Searching for SNR: {snr} in {settings_folder}")
         start_time = time.time()
-        settings_file, found_hardware_node = None, None
-        all_xml_files = list(settings_folder.rglob("*.xml"))
-        sorted_xml_files = sorted(all_xml_files, key=lambda p: p.stat().st_mtime, reverse=True)
-        logging.info(f"[Core] Found {len(all_xml_files)} XML files, sorted by MODIFICATION DATE.")
+        settings_file, found_hardware_node = _find_settings_for_snr(settings_folder, snr)
+        if settings_file:
+            logging.debug(f"[Core] MATCH FOUND! File: {settings_file}")
 
-        for xml_path in sorted_xml_files:
-            try:
-                tree_settings = ET.parse(str(xml_path), SECURE_PARSER)
-                hardware_node_match = tree_settings.find(f".//hardware[@snr='{snr}']")
-                if hardware_node_match is not None:
-                    settings_file, found_hardware_node = xml_path, hardware_node_match
-                    logging.info(f"[Core] MATCH FOUND! File: {xml_path}")
-                    break
-            except Exception:
-                pass
-
-        logging.info(f"[Core] Settings search took: {time.time() - start_time:.4f} s.")
+        logging.debug(f"[Core] Settings search took: {time.time() - start_time:.4f} s.")
 
         if not settings_file or found_hardware_node is None:
             logging.warning(f"[Core] No settings found for SNR: {snr}")
@@ -491,7 +1285,7 @@ def process_core_logic(report_file_path, settings_folder_str, dmc_code):
         settings_values = {}
         settings_original_ids = {}
         for prefix in ["HWEL", "BTLD", "SWFL"]:
-            te_nodes = found_hardware_node.xpath(f".//te[starts-with(@id, '{prefix}')]")
+            te_nodes = _FIND_TE_PREFIX(found_hardware_node, pfx=prefix)
             te_node = te_nodes[0] if te_nodes else None
             if te_node is not None:
                 original_id = te_node.get('id')
@@ -530,14 +1324,17 @@ def process_core_logic(report_file_path, settings_folder_str, dmc_code):
 
 def process_file_wrapper(report_file_path, config, is_manual_check=False):
     """Główny wrapper dla Manual Check."""
-    logging.info(f"[Wrapper] Entered wrapper for: {report_file_path} (Manual: {is_manual_check})")
+    logging.debug(f"[Wrapper] Entered wrapper for: {report_file_path} (Manual: {is_manual_check})")
     try:
-        report_path = Path(report_file_path)
-        if not report_path.exists():
+        report_path = os.fspath(report_file_path)
+        if not os.path.exists(report_path):
             logging.warning(f"[Wrapper] File {report_path} no longer exists.")
             return {"success": False, "error": "File not found"}
 
-        dmc_code = report_path.parts[-3]
+        # <DMC>/<timestamp>/<report>.xml
+        dmc_code = os.path.basename(os.path.dirname(os.path.dirname(report_path)))
+        if not dmc_code:
+            raise IndexError(report_path)
 
     except IndexError:
         logging.error(f"[Wrapper CRITICAL] Could not extract DMC from path: {report_file_path}.", exc_info=True)
@@ -547,7 +1344,7 @@ def process_file_wrapper(report_file_path, config, is_manual_check=False):
                       exc_info=True)
         return {"success": False, "error": "Wrapper initialization failed"}
 
-    logging.info(f"[Wrapper] Processing file: {report_path} for DMC: {dmc_code} (Manual: {is_manual_check})")
+    logging.debug(f"[Wrapper] Processing file: {report_path} for DMC: {dmc_code} (Manual: {is_manual_check})")
     settings_folder = config.get('settingsFolder')
     core_result = process_core_logic(report_path, settings_folder, dmc_code)
     recipients = config.get('mailRecipients')
@@ -559,15 +1356,15 @@ def process_file_wrapper(report_file_path, config, is_manual_check=False):
 
             # Zapisz do CSV (Manual Check trafia do bazy danych)
             if csv_path_to_use:
-                threading.Thread(target=log_to_csv, args=(csv_path_to_use, response_data)).start()
+                log_to_csv(csv_path_to_use, response_data)
 
             if is_manual_check:
-                threading.Thread(target=log_manual_scan, args=(response_data,)).start()
+                _bg_pool.submit(log_manual_scan, response_data)
 
             if response_data.get('finalResult') == "NOK":
                 # Wysłanie emaila NOK
                 if recipients:
-                    threading.Thread(target=send_nok_email, args=(recipients, response_data)).start()
+                    _mail_pool.submit(send_nok_email, recipients, response_data)
                 
                 send_toast(
                     title="NOK Detected!",
@@ -589,15 +1386,15 @@ def process_file_wrapper(report_file_path, config, is_manual_check=False):
                     "dmc": dmc_code,
                     "snr": core_result.get('snr', 'N/A'),
                     "finalResult": "ERROR",
-                    "reportFile": str(report_path),
+                    "reportFile": report_path,
                     "errorMessage": error_message
                 }
-                threading.Thread(target=log_manual_scan, args=(error_data,)).start()
+                _bg_pool.submit(log_manual_scan, error_data)
 
             send_toast(
                 title="Processing ERROR!",
                 line1=f"Error: {error_message}",
-                line2=f"File: {report_path.name}"
+                line2=f"File: {os.path.basename(report_path)}"
             )
     except Exception as e:
         logging.error(f"[Wrapper] Error during post-processing for {dmc_code}: {e}", exc_info=True)
@@ -620,8 +1417,8 @@ def process_pdi_check(excel_file_path, settings_folder_str):
     - M17: SWFL DEC
     """
     try:
-        excel_path = Path(excel_file_path)
-        settings_folder = Path(settings_folder_str)
+        excel_path = _config_path(excel_file_path)
+        settings_folder = _config_path(settings_folder_str)
 
         if not excel_path.exists():
             return {"success": False, "error": "msgExcelNotFound", "excelFile": str(excel_path)}
@@ -633,48 +1430,40 @@ def process_pdi_check(excel_file_path, settings_folder_str):
             return {"success": False, "error": "msgOpenpyxlNotInstalled"}
 
         # Read Excel file
-        logging.info(f"[PDI Check] Opening Excel file: {excel_path}")
-        wb = openpyxl.load_workbook(str(excel_path), data_only=True)
-        sheet = wb.active
-
-        # Read values from Excel
-        snr = str(sheet['M5'].value or '').strip()
-        hwel_hex_excel = str(sheet['M8'].value or '').strip().upper()
-        hwel_dec_excel = str(sheet['M9'].value or '').strip()
-        btld_hex_excel = str(sheet['M14'].value or '').strip().upper()
-        btld_dec_excel = str(sheet['M15'].value or '').strip()
-        swfl_hex_excel = str(sheet['M16'].value or '').strip().upper()
-        swfl_dec_excel = str(sheet['M17'].value or '').strip()
-
-        wb.close()
-
-        logging.info(f"[PDI Check] Excel values - SNR: {snr}")
-        logging.info(f"[PDI Check] HWEL: HEX={hwel_hex_excel}, DEC={hwel_dec_excel}")
-        logging.info(f"[PDI Check] BTLD: HEX={btld_hex_excel}, DEC={btld_dec_excel}")
-        logging.info(f"[PDI Check] SWFL: HEX={swfl_hex_excel}, DEC={swfl_dec_excel}")
+        logging.debug(f"[PDI Check] Opening Excel file: {excel_path}")
+        # read_only streams the sheet instead of loading every cell and style
+        wb = openpyxl.load_workbook(str(excel_path), data_only=True, read_only=True)
+        try:
+            rows = wb.active.iter_rows(min_row=5, max_row=17, min_col=13, max_col=13, values_only=True)
+            cells = {row_no: row[0] for row_no, row in enumerate(rows, start=5)}
+        finally:
+            wb.close()
+
+        # Read values from Excel (column M)
+        snr = str(cells.get(5) or '').strip()
+        hwel_hex_excel = str(cells.get(8) or '').strip().upper()
+        hwel_dec_excel = str(cells.get(9) or '').strip()
+        btld_hex_excel = str(cells.get(14) or '').strip().upper()
+        btld_dec_excel = str(cells.get(15) or '').strip()
+        swfl_hex_excel = str(cells.get(16) or '').strip().upper()
+        swfl_dec_excel = str(cells.get(17) or '').strip()
+
+        logging.debug(f"[PDI Check] Excel values - SNR: {snr}")
+        logging.debug(f"[PDI Check] HWEL: HEX={hwel_hex_excel}, DEC={hwel_dec_excel}")
+        logging.debug(f"[PDI Check] BTLD: HEX={btld_hex_excel}, DEC={btld_dec_excel}")
+        logging.debug(f"[PDI Check] SWFL: HEX={swfl_hex_excel}, DEC={swfl_dec_excel}")
 
         if not snr:
             return {"success": False, "error": "msgSnrNotFoundInExcel", "excelFile": str(excel_path)}
 
         # Search for SNR in Settings XML files
-        logging.info(f"[PDI Check] Searching for SNR: {snr} in {settings_folder}")
+        logging.debug(f"[PDI Check] Searching for SNR: {snr} in {settings_folder}")
         start_time = time.time()
-        settings_file, found_hardware_node = None, None
-        all_xml_files = list(settings_folder.rglob("*.xml"))
-        sorted_xml_files = sorted(all_xml_files, key=lambda p: p.stat().st_mtime, reverse=True)
+        settings_file, found_hardware_node = _find_settings_for_snr(settings_folder, snr)
+        if settings_file:
+            logging.debug(f"[PDI Check] MATCH FOUND! File: {settings_file}")
 
-        for xml_path in sorted_xml_files:
-            try:
-                tree_settings = ET.parse(str(xml_path), SECURE_PARSER)
-                hardware_node_match = tree_settings.find(f".//hardware[@snr='{snr}']")
-                if hardware_node_match is not None:
-                    settings_file, found_hardware_node = xml_path, hardware_node_match
-                    logging.info(f"[PDI Check] MATCH FOUND! File: {xml_path}")
-                    break
-            except Exception:
-                pass
-
-        logging.info(f"[PDI Check] Settings search took: {time.time() - start_time:.4f} s.")
+        logging.debug(f"[PDI Check] Settings search took: {time.time() - start_time:.4f} s.")
 
         if not settings_file or found_hardware_node is None:
             logging.warning(f"[PDI Check] No settings found for SNR: {snr}")
@@ -683,7 +1472,7 @@ def process_pdi_check(excel_file_path, settings_folder_str):
         # Extract values from Settings XML
         settings_values = {}
         for prefix in ["HWEL", "BTLD", "SWFL"]:
-            te_nodes = found_hardware_node.xpath(f".//te[starts-with(@id, '{prefix}')]")
+            te_nodes = _FIND_TE_PREFIX(found_hardware_node, pfx=prefix)
             te_node = te_nodes[0] if te_nodes else None
             if te_node is not None:
                 original_id = te_node.get('id')
@@ -696,55 +1485,27 @@ def process_pdi_check(excel_file_path, settings_folder_str):
             else:
                 settings_values[prefix] = {"hex": "", "dec": "", "original_id": ""}
 
-        logging.info(f"[PDI Check] Settings values: {settings_values}")
+        logging.debug(f"[PDI Check] Settings values: {settings_values}")
 
-        # Compare Excel vs Settings (both HEX middle part and DEC end part)
+        # Compare Excel vs Settings - both HEX middle part and DEC end part must match
+        checks = (("HWEL", hwel_hex_excel, hwel_dec_excel),
+                  ("BTLD", btld_hex_excel, btld_dec_excel),
+                  ("SWFL", swfl_hex_excel, swfl_dec_excel))
         results = []
-
-        # HWEL comparison - both parts must match
-        hwel_hex_match = hwel_hex_excel == settings_values["HWEL"]["hex"]
-        hwel_dec_match = hwel_dec_excel == settings_values["HWEL"]["dec"]
-        hwel_overall = hwel_hex_match and hwel_dec_match
-        results.append({
-            "Field": "HWEL",
-            "ExcelHex": hwel_hex_excel,
-            "ExcelDec": hwel_dec_excel,
-            "SettingsHex": settings_values["HWEL"]["hex"],
-            "SettingsDec": settings_values["HWEL"]["dec"],
-            "HexMatch": "OK" if hwel_hex_match else "NOK",
-            "DecMatch": "OK" if hwel_dec_match else "NOK",
-            "Result": "OK" if hwel_overall else "NOK"
-        })
-
-        # BTLD comparison - both parts must match
-        btld_hex_match = btld_hex_excel == settings_values["BTLD"]["hex"]
-        btld_dec_match = btld_dec_excel == settings_values["BTLD"]["dec"]
-        btld_overall = btld_hex_match and btld_dec_match
-        results.append({
-            "Field": "BTLD",
-            "ExcelHex": btld_hex_excel,
-            "ExcelDec": btld_dec_excel,
-            "SettingsHex": settings_values["BTLD"]["hex"],
-            "SettingsDec": settings_values["BTLD"]["dec"],
-            "HexMatch": "OK" if btld_hex_match else "NOK",
-            "DecMatch": "OK" if btld_dec_match else "NOK",
-            "Result": "OK" if btld_overall else "NOK"
-        })
-
-        # SWFL comparison - both parts must match
-        swfl_hex_match = swfl_hex_excel == settings_values["SWFL"]["hex"]
-        swfl_dec_match = swfl_dec_excel == settings_values["SWFL"]["dec"]
-        swfl_overall = swfl_hex_match and swfl_dec_match
-        results.append({
-            "Field": "SWFL",
-            "ExcelHex": swfl_hex_excel,
-            "ExcelDec": swfl_dec_excel,
-            "SettingsHex": settings_values["SWFL"]["hex"],
-            "SettingsDec": settings_values["SWFL"]["dec"],
-            "HexMatch": "OK" if swfl_hex_match else "NOK",
-            "DecMatch": "OK" if swfl_dec_match else "NOK",
-            "Result": "OK" if swfl_overall else "NOK"
-        })
+        for field, excel_hex, excel_dec in checks:
+            settings_hex, settings_dec = settings_values[field]["hex"], settings_values[field]["dec"]
+            hex_match = excel_hex == settings_hex
+            dec_match = excel_dec == settings_dec
+            results.append({
+                "Field": field,
+                "ExcelHex": excel_hex,
+                "ExcelDec": excel_dec,
+                "SettingsHex": settings_hex,
+                "SettingsDec": settings_dec,
+                "HexMatch": "OK" if hex_match else "NOK",
+                "DecMatch": "OK" if dec_match else "NOK",
+                "Result": "OK" if hex_match and dec_match else "NOK"
+            })
 
         final_result = "NOK" if any(r["Result"] == "NOK" for r in results) else "OK"
         logging.info(f"[PDI Check] SNR: {snr} | RESULT: {final_result}")
@@ -762,7 +1523,7 @@ def process_pdi_check(excel_file_path, settings_folder_str):
         }
 
         # Log the PDI check to JSON
-        threading.Thread(target=log_pdi_check, args=(response_data,)).start()
+        _bg_pool.submit(log_pdi_check, response_data)
 
         # Log to CSV
         config = load_config_from_file()
@@ -771,15 +1532,12 @@ def process_pdi_check(excel_file_path, settings_folder_str):
                 "dmc": "PDI_CHECK",
                 "snr": snr,
                 "finalResult": final_result,
-                "results": [
-                    {"Field": "HWEL", "Report": hwel_hex_excel, "Settings": settings_values["HWEL"]["hex"]},
-                    {"Field": "BTLD", "Report": btld_hex_excel, "Settings": settings_values["BTLD"]["hex"]},
-                    {"Field": "SWFL", "Report": swfl_hex_excel, "Settings": settings_values["SWFL"]["hex"]}
-                ],
+                "results": [{"Field": r["Field"], "Report": r["ExcelHex"], "Settings": r["SettingsHex"]}
+                            for r in results],
                 "reportFile": str(excel_path),
                 "settingsFile": str(settings_file)
             }
-            threading.Thread(target=log_to_csv, args=(config['csvPath'], csv_data)).start()
+            log_to_csv(config['csvPath'], csv_data)
 
         if final_result == "NOK":
             recipients = config.get('mailRecipients', [])
@@ -787,15 +1545,12 @@ def process_pdi_check(excel_file_path, settings_folder_str):
                 email_data = {
                     "snr": snr,
                     "dmc": "PDI_CHECK",
-                    "results": [
-                        {"Field": "HWEL", "Report": hwel_hex_excel, "Settings": settings_values["HWEL"]["hex"], "Result": results[0]["Result"]},
-                        {"Field": "BTLD", "Report": btld_hex_excel, "Settings": settings_values["BTLD"]["hex"], "Result": results[1]["Result"]},
-                        {"Field": "SWFL", "Report": swfl_hex_excel, "Settings": settings_values["SWFL"]["hex"], "Result": results[2]["Result"]}
-                    ],
+                    "results": [{"Field": r["Field"], "Report": r["ExcelHex"], "Settings": r["SettingsHex"],
+                                 "Result": r["Result"]} for r in results],
                     "reportFile": str(excel_path),
                     "settingsFile": str(settings_file)
                 }
-                threading.Thread(target=send_nok_email, args=(recipients, email_data)).start()
+                _mail_pool.submit(send_nok_email, recipients, email_data)
             
             send_toast(
                 title="PDI Check NOK!",
@@ -818,9 +1573,28 @@ def process_pdi_check(excel_file_path, settings_folder_str):
 
 # === API Endpoints ===
 
+INDEX_FILE = STATIC_FILES_DIR / 'index.html'
+_index_cache = {"entry": None}  # (key, body, etag) - podmieniane jako całość
+
+
 @app.route('/')
 def serve_index():
-    return send_from_directory(STATIC_FILES_DIR, 'index.html')
+    """index.html z pamięci z ETag - przeglądarka dostaje 304, dopóki plik się nie zmieni."""
+    try:
+        st = os.stat(INDEX_FILE)
+    except OSError:
+        return send_from_directory(STATIC_FILES_DIR, 'index.html')
+    key = (st.st_mtime_ns, st.st_size)
+    entry = _index_cache["entry"]
+    if entry is None or entry[0] != key:
+        with open(INDEX_FILE, 'rb') as f:
+            body = f.read()
+        entry = _index_cache["entry"] = (key, body, hashlib.md5(body, usedforsecurity=False).hexdigest())
+
+    resp = Response(entry[1], mimetype='text/html')
+    resp.set_etag(entry[2])
+    resp.headers['Cache-Control'] = 'no-cache'
+    return resp.make_conditional(request)
 
 
 @app.route('/api/load-config', methods=['GET'])
@@ -835,11 +1609,20 @@ def save_config():
         if 'mailRecipients' in data and isinstance(data['mailRecipients'], list):
             data['mailRecipients'] = [e.strip() for e in data['mailRecipients'] if e.strip() and '@' in e]
 
-        current_config = load_config_from_file()
-        current_config.update({k: v for k, v in data.items() if k in current_config})
+        with config_save_lock:
+            # Hot cache -> no disk read; merged config is written atomically (tmp + os.replace)
+            current_config = load_config_from_file()
+            current_config.update({k: v for k, v in data.items() if k in current_config})
 
-        with open(CONFIG_FILE, 'w', encoding='utf-8') as f:
-            json.dump(current_config, f, indent=2)
+            tmp_file = CONFIG_FILE.with_suffix('.json.tmp')
+            with open(tmp_file, 'wb') as f:
+                f.write(_json_pretty(current_config))
+            os.replace(tmp_file, CONFIG_FILE)
+            _store_config_cache(current_config)
+        _status_cache.clear()  # /api/status po zapisie sprawdza ścieżki od nowa
+
+        if 'settingsFolder' in data:
+            warm_settings_index(current_config.get('settingsFolder'))
 
         return jsonify({"success": True})
     except Exception as e:
@@ -847,16 +1630,87 @@ def save_config():
         return jsonify({"error": str(e)}), 500
 
 
+# === Tk File Dialogs ===
+# Tk jest związany z wątkiem, który go utworzył - jeden ukryty root żyje na dedykowanym wątku
+_tk_state = {"root": None}
+_tk_queue = queue.Queue()  # (funkcja, Future); None = zniszcz root i zakończ wątek Tk
+
+
+def _get_tk_root():
+    if _tk_state["root"] is None:
+        root = tk.Tk()
+        root.withdraw()
+        root.attributes("-topmost", True)
+        _tk_state["root"] = root
+    return _tk_state["root"]
+
+
+def _run_file_dialog(dialog, **kwargs):
+    """Otwiera okno dialogowe na wątku Tk, z ponownie używanym ukrytym rootem."""
+    def show():
+        try:
+            root = _get_tk_root()
+            path = dialog(parent=root, **kwargs)
+            root.update()
+            return path
+        except Exception:
+            # Uszkodzony interpreter Tk - następne wywołanie utworzy nowy root
+            root, _tk_state["root"] = _tk_state["root"], None
+            if root is not None:
+                try:
+                    root.destroy()
+                except Exception:
+                    pass
+            raise
+    future = Future()
+    _tk_queue.put((show, future))
+    return future.result()
+
+
+def _destroy_tk_root():
+    root, _tk_state["root"] = _tk_state["root"], None
+    if root is not None:
+        root.destroy()
+
+
+def _tk_loop():
+    """Jedyny wątek Tk: wykonuje zlecenia z kolejki; None niszczy ukryty root na tym wątku i kończy pętlę.
+
+    Własna pętla zamiast ThreadPoolExecutor - pula jest zamykana przed handlerami atexit."""
+    while True:
+        item = _tk_queue.get()
+        if item is None:
+            try:
+                _destroy_tk_root()
+            except Exception as e:
+                logging.warning(f"Tk shutdown error: {e}")
+            return
+        fn, future = item
+        if future.set_running_or_notify_cancel():
+            try:
+                future.set_result(fn())
+            except BaseException as e:
+                future.set_exception(e)
+
+
+_tk_thread = threading.Thread(target=_tk_loop, name="sc-tk", daemon=True)
+_tk_thread.start()
+
+
+def _shutdown_tk():
+    _tk_queue.put(None)
+    _tk_thread.join(timeout=2)
+
+
+atexit.register(_shutdown_tk)
+
+
 @app.route('/api/browse-folder', methods=['GET'])
 def browse_folder():
     if not TKINTER_AVAILABLE:
         return jsonify({"success": False, "error": "File dialogs not available (tkinter missing)"}), 500
     try:
-        root = tk.Tk()
-        root.withdraw()
-        root.attributes("-topmost", True)
-        path = filedialog.askdirectory(title="Select folder")
-        root.destroy()
+        path = _run_file_dialog(filedialog.askdirectory, title="Select folder")
         return jsonify({"success": True, "path": path}) if path else jsonify({"success": False, "error": "Cancelled"})
     except Exception as e:
         logging.error("Error in browse_folder: %s", e)
@@ -869,12 +1723,8 @@ def browse_file():
     if not TKINTER_AVAILABLE:
         return jsonify({"success": False, "error": "File dialogs not available (tkinter missing)"}), 500
     try:
-        root = tk.Tk()
-        root.withdraw()
-        root.attributes("-topmost", True)
         file_types = [("Excel files", "*.xlsx *.xlsm"), ("All files", "*.*")]
-        path = filedialog.askopenfilename(title="Select Excel file", filetypes=file_types)
-        root.destroy()
+        path = _run_file_dialog(filedialog.askopenfilename, title="Select Excel file", filetypes=file_types)
         return jsonify({"success": True, "path": path}) if path else jsonify({"success": False, "error": "Cancelled"})
     except Exception as e:
         logging.error("Error in browse_file: %s", e)
@@ -893,8 +1743,8 @@ def run_check():
     if not dmc or not settings_folder_str or not reports_folder_str:
         return jsonify({"success": False, "error": "msgPathsNotSet"})
 
-    reports_folder = Path(reports_folder_str)
-    settings_folder = Path(settings_folder_str)
+    reports_folder = _config_path(reports_folder_str)
+    settings_folder = _config_path(settings_folder_str)
 
     if not settings_folder.is_dir():
         return jsonify({"success": False, "error": "msgDmcEmptyOrPathsInvalid"})
@@ -904,24 +1754,21 @@ def run_check():
 
     try:
         report_file = None
-        dmc_folders = sorted(reports_folder.glob(f"{dmc}*"), key=lambda p: p.stat().st_mtime, reverse=True)
-
-        if dmc_folders:
-            dmc_folder = dmc_folders[0]
-            timestamp_folders = sorted(
-                [d for d in dmc_folder.iterdir() if d.is_dir() and is_timestamp_folder(d.name)],
-                key=lambda p: p.name,
-                reverse=True
-            )
-
-            if timestamp_folders:
-                xml_files = list(timestamp_folders[0].rglob("*.xml"))
-                if xml_files:
-                    report_file = xml_files[0]
+        # Only the newest DMC folder / timestamp folder / first XML is needed - no full sorts
+        # scandir: on Windows DirEntry.stat() comes from the directory read itself
+        dmc_prefix = os.path.normcase(dmc)
+        with os.scandir(reports_folder) as it:
+            newest = max(((e.stat().st_mtime, e.path) for e in it
+                          if os.path.normcase(e.name).startswith(dmc_prefix) and e.is_dir()),
+                         key=lambda e: e[0], default=None)
+        dmc_folder = Path(newest[1]) if newest else None
+
+        if dmc_folder is not None:
+            report_file = find_latest_report(dmc_folder)
 
         if not report_file:
             error_data = {"dmc": dmc, "finalResult": "ERROR", "errorMessage": "msgReportNotFound"}
-            threading.Thread(target=log_manual_scan, args=(error_data,)).start()
+            _bg_pool.submit(log_manual_scan, error_data)
             return jsonify({"success": False, "error": "msgReportNotFound", "dmc": dmc})
 
         result = process_file_wrapper(report_file, config, is_manual_check=True)
@@ -967,25 +1814,74 @@ def _get_csv_path(config_data):
     csv_path_str = config_data.get('csvPath')
     if not csv_path_str:
         return None
-    csv_path = Path(csv_path_str)
+    csv_path = _config_path(csv_path_str)
     return csv_path / "results.csv" if csv_path.is_dir() else csv_path
 
 
+# Gotowe ciało JSON historii; ponowny odczyt CSV tylko gdy zmienił się plik.
+# Większe pliki nie są trzymane w pamięci - get_history strumieniuje je wiersz po wierszu.
+HISTORY_CACHE_MAX_BYTES = 20_000_000
+_history_cache = {"key": None, "body": b"[]", "lock": threading.Lock()}
+
+
+def _iter_history_rows(f):
+    """Strumieniuje tablicę JSON z otwartego pliku CSV - w pamięci jest tylko bieżący wiersz."""
+    with f:
+        yield b'['
+        sep = b''
+        for row in csv.DictReader(f):
+            yield sep + _json_compact(row)
+            sep = b','
+        yield b']'
+
+
+def _load_history_cached(csv_path, st):
+    """Zwraca ciało JSON historii z cache, klucz (ścieżka, mtime_ns, size)."""
+    key = (str(csv_path), st.st_mtime_ns, st.st_size)
+    with _history_cache["lock"]:
+        if _history_cache["key"] != key:
+            f = open(csv_path, 'r', encoding='utf-8-sig', newline='')
+            body = b''.join(_iter_history_rows(f))
+            _history_cache.update(key=key, body=body)
+        return _history_cache["body"]
+
+
+def _clear_history_cache():
+    with _history_cache["lock"]:
+        _history_cache.update(key=None, body=b"[]")
+
+
 @app.route('/api/get-history', methods=['GET'])
 def get_history():
     csv_path = _get_csv_path(load_config_from_file())
+    _flush_csv()  # wiersze z kolejki muszą być już w pliku (może go dopiero utworzyć)
     if not csv_path or not csv_path.exists():
         return jsonify([])
+
     try:
-        data = []
-        with open(csv_path, 'r', encoding='utf-8-sig') as f:
-            reader = csv.DictReader(f)
-            for row in reader:
-                data.append(row)
-        return jsonify(data)
+        st = csv_path.stat()
+        if st.st_size <= HISTORY_CACHE_MAX_BYTES:
+            return Response(_load_history_cached(csv_path, st), mimetype='application/json')
+        # Otwarcie przed zwróceniem odpowiedzi - błąd odczytu nadal daje 500
+        f = open(csv_path, 'r', encoding='utf-8-sig', newline='')
     except Exception as e:
         logging.error(f"Error reading history CSV {csv_path}: {e}", exc_info=True)
         return jsonify({"error": str(e)}), 500
+    return Response(_iter_history_rows(f), mimetype='application/json')
+
+
+_HIST_KEYS = ('timestamp', 'dmc', 'snr', 'final', 'report_file', 'settings_file')
+_HIST_HEADER_LINE = ','.join(_HIST_KEYS) + '\r\n'
+
+
+def _csv_field(value):
+    """Pole CSV jak w csv.writer (QUOTE_MINIMAL): cudzysłów tylko gdy są , " lub znaki nowej linii."""
+    if value is None:
+        return ''
+    value = str(value)
+    if ',' in value or '"' in value or '\n' in value or '\r' in value:
+        return '"' + value.replace('"', '""') + '"'
+    return value
 
 
 @app.route('/api/export-history-csv', methods=['POST'])
@@ -995,15 +1891,13 @@ def export_history_csv():
         if not filtered_data:
             return jsonify({"success": False, "error": "No data to export"}), 400
 
-        import io
-        output = io.StringIO()
-        writer = csv.writer(output)
-        writer.writerow(["timestamp", "dmc", "snr", "final", "report_file", "settings_file"])
-        
+        # Wiersze składane przez join zamiast csv.writer + StringIO; wynik identyczny (QUOTE_MINIMAL, CRLF)
+        chunks = [_HIST_HEADER_LINE]
         for row in filtered_data:
-            writer.writerow([row.get(k, '') for k in ['timestamp', 'dmc', 'snr', 'final', 'report_file', 'settings_file']])
+            chunks.append(','.join(_csv_field(row.get(k, '')) for k in _HIST_KEYS) + '\r\n')
 
-        return jsonify({"success": True, "csv_data": output.getvalue()})
+        # Plik CSV wprost w odpowiedzi - bez ponownego kodowania całego tekstu jako pola JSON
+        return _download_response(''.join(chunks).encode('utf-8'), 'text/csv', 'History_Export.csv')
     except Exception as e:
         logging.error(f"CSV export error: {e}")
         return jsonify({"success": False, "error": str(e)}), 500
@@ -1011,70 +1905,28 @@ def export_history_csv():
 
 @app.route('/api/get-stats', methods=['GET'])
 def get_stats():
-    stats = {"total_ok": 0, "total_nok": 0, "nok_details": defaultdict(int), "last_result": "N/A",
-             "last_timestamp": "N/A"}
     csv_path = _get_csv_path(load_config_from_file())
+    _flush_csv()  # wiersze z kolejki muszą być już w pliku (może go dopiero utworzyć)
     if not csv_path or not csv_path.exists():
-        return jsonify(stats)
+        return jsonify(_empty_stats())
     try:
-        with open(csv_path, 'r', encoding='utf-8-sig') as f:
-            reader = csv.DictReader(f)
-            history = list(reader)
-
-            if history:
-                latest = history[-1]
-                stats['last_result'] = latest.get('final', 'N/A')
-                stats['last_timestamp'] = latest.get('timestamp', 'N/A')
-
-            for row in history:
-                if row.get('final') == 'OK':
-                    stats['total_ok'] += 1
-                elif row.get('final') == 'NOK':
-                    stats['total_nok'] += 1
-                    if row.get('hwel_report') != row.get('hwel_set'):
-                        stats['nok_details']['HWEL'] += 1
-                    if row.get('btld_report') != row.get('btld_set'):
-                        stats['nok_details']['BTLD'] += 1
-                    if row.get('swfl_report') != row.get('swfl_set'):
-                        stats['nok_details']['SWFL'] += 1
-
-        return jsonify(stats)
+        path = os.path.abspath(csv_path)
+        with csv_lock:
+            stats = _cached_stats(path, _csv_stamp(path))
+            if stats is None:
+                # Brak / nieaktualny STATS_FILE - jednorazowe przeliczenie całej historii
+                stats = _empty_stats()
+                with open(csv_path, 'r', encoding='utf-8-sig', newline='') as f:
+                    for row in csv.DictReader(f):
+                        _apply_stats_row(stats, row)
+                _store_stats(path, stats)
+            return jsonify(stats)
     except Exception as e:
         logging.error(f"Error calculating stats from CSV {csv_path}: {e}", exc_info=True)
         return jsonify({"error": str(e)}), 500
 
 
-SMAC_TEMPLATE = {"documentVersion": "1.0", "comment": "", "testStepResults": [{"step": 1,
-                                                                               "description": "apiJob(\"F01\",\"STATUS_SVK_SMACS_CURRENT_FUNKTIONAL\",\"\",\"\")",
-                                                                               "iterations": [{"iteration": 1,
-                                                                                               "resultItems": [{
-                                                                                                   "name": "Set : 2",
-                                                                                                   "type": "",
-                                                                                                   "value": "",
-                                                                                                   "resultItems": [{
-                                                                                                       "name": "SMAC_ID[0]",
-                                                                                                       "type": "BINARY",
-                                                                                                       "value": "00 51"},
-                                                                                                       {
-                                                                                                           "name": "SGBM_ID[0][0]",
-                                                                                                           "type": "TEXT",
-                                                                                                           "value": "PLACEHOLDER_HWEL"},
-                                                                                                       {
-                                                                                                           "name": "SGBM_ID[0][1]",
-                                                                                                           "type": "TEXT",
-                                                                                                           "value": "PLACEHOLDER_BTLD"},
-                                                                                                       {
-                                                                                                           "name": "SGBM_ID[0][2]",
-                                                                                                           "type": "TEXT",
-                                                                                                           "value": "PLACEHOLDER_SWFL"},
-                                                                                                       {
-                                                                                                           "name": "PROGRAMMING_DEPENDENCIES_CHECKED[0]",
-                                                                                                           "type": "TEXT",
-                                                                                                           "value": "0x01"},
-                                                                                                       {
-                                                                                                           "name": "PROGRAMMING_DEPENDENCIES_CHECKED_TEXT[0]",
-                                                                                                           "type": "TEXT",
-                                                                                                           "value": "correct Result"}]}]}]}]}
+SMAC_API_JOB = "apiJob(\"F01\",\"STATUS_SVK_SMACS_CURRENT_FUNKTIONAL\",\"\",\"\")"
 
 
 def _convert_id_to_smac_format(original_id):
@@ -1084,20 +1936,47 @@ def _convert_id_to_smac_format(original_id):
     return f"{parts[0]}-{parts[1]}-{parts[2]}" if len(parts) == 3 else original_id
 
 
+def _download_response(payload, mimetype, filename):
+    """Odpowiedź z gotowymi bajtami pliku - przekazywana do WSGI bez dodatkowego buforowania."""
+    return Response(
+        [payload],
+        mimetype=mimetype,
+        direct_passthrough=True,
+        headers={
+            'Content-Length': str(len(payload)),
+            'Content-Disposition': f'attachment; filename={filename}'
+        }
+    )
+
+
+def _make_smac(data):
+    """Buduje SMAC JSON z ID HWEL/BTLD/SWFL z żądania (wspólne dla generate i download)."""
+    hwel = _convert_id_to_smac_format(data.get('hwelId', ''))
+    btld = _convert_id_to_smac_format(data.get('btldId', ''))
+    swfl = _convert_id_to_smac_format(data.get('swflId', ''))
+    # Stały kształt dokumentu - budowany od razu jako nowy dict, bez kopiowania szablonu
+    return {"documentVersion": "1.0", "comment": "", "testStepResults": [{
+        "step": 1,
+        "description": SMAC_API_JOB,
+        "iterations": [{"iteration": 1, "resultItems": [{
+            "name": "Set : 2", "type": "", "value": "",
+            "resultItems": [
+                {"name": "SMAC_ID[0]", "type": "BINARY", "value": "00 51"},
+                {"name": "SGBM_ID[0][0]", "type": "TEXT", "value": hwel},
+                {"name": "SGBM_ID[0][1]", "type": "TEXT", "value": btld},
+                {"name": "SGBM_ID[0][2]", "type": "TEXT", "value": swfl},
+                {"name": "PROGRAMMING_DEPENDENCIES_CHECKED[0]", "type": "TEXT", "value": "0x01"},
+                {"name": "PROGRAMMING_DEPENDENCIES_CHECKED_TEXT[0]", "type": "TEXT", "value": "correct Result"},
+            ]}]}],
+    }]}
+
+
 @app.route('/api/generate-smac-json', methods=['POST'])
 def generate_smac_json():
     try:
         data = request.json
-        smac_json = json.loads(json.dumps(SMAC_TEMPLATE))
-        items_list = smac_json["testStepResults"][0]["iterations"][0]["resultItems"][0]["resultItems"]
-        for item in items_list:
-            if item["name"] == "SGBM_ID[0][0]":
-                item["value"] = _convert_id_to_smac_format(data.get('hwelId', ''))
-            elif item["name"] == "SGBM_ID[0][1]":
-                item["value"] = _convert_id_to_smac_format(data.get('btldId', ''))
-            elif item["name"] == "SGBM_ID[0][2]":
-                item["value"] = _convert_id_to_smac_format(data.get('swflId', ''))
-        logging.info(f"Generated SMAC JSON for HWEL: {data.get('hwelId', '')}")
+        smac_json = _make_smac(data)
+        logging.debug(f"Generated SMAC JSON for HWEL: {data.get('hwelId', '')}")
         return jsonify(smac_json)
     except Exception as e:
         logging.error(f"Error generating SMAC JSON: {e}", exc_info=True)
@@ -1111,26 +1990,10 @@ def download_smac_json():
         data = request.json
         snr = data.get('snr', 'unknown')
         
-        smac_json = json.loads(json.dumps(SMAC_TEMPLATE))
-        items_list = smac_json["testStepResults"][0]["iterations"][0]["resultItems"][0]["resultItems"]
-        for item in items_list:
-            if item["name"] == "SGBM_ID[0][0]":
-                item["value"] = _convert_id_to_smac_format(data.get('hwelId', ''))
-            elif item["name"] == "SGBM_ID[0][1]":
-                item["value"] = _convert_id_to_smac_format(data.get('btldId', ''))
-            elif item["name"] == "SGBM_ID[0][2]":
-                item["value"] = _convert_id_to_smac_format(data.get('swflId', ''))
-        
-        from flask import Response
-        json_str = json.dumps(smac_json, indent=2)
+        smac_json = _make_smac(data)
         
-        return Response(
-            json_str,
-            mimetype='application/json',
-            headers={
-                'Content-Disposition': f'attachment; filename=SMAC_{snr}.json'
-            }
-        )
+        payload = _json_pretty(smac_json)
+        return _download_response(payload, 'application/json', f'SMAC_{snr}.json')
     except Exception as e:
         logging.error(f"Error downloading SMAC JSON: {e}", exc_info=True)
         return jsonify({"error": "Failed to download SMAC JSON"}), 500
@@ -1144,59 +2007,55 @@ def download_screenshot():
         image_data = data.get('imageData', '')
         dmc = data.get('dmc', 'unknown')
         
-        if not image_data or not image_data.startswith('data:image'):
+        # Remove data URL prefix - regex sprawdza tylko początek wielo-MB stringa
+        m = _DATA_URL_RE.match(image_data) if isinstance(image_data, str) else None
+        if not m:
             return jsonify({"error": "Invalid image data"}), 400
+        image_bytes = binascii.a2b_base64(image_data[m.end():])
         
-        # Remove data URL prefix
-        import base64
-        header, encoded = image_data.split(',', 1)
-        image_bytes = base64.b64decode(encoded)
-        
-        from flask import Response
         timestamp = datetime.now().strftime('%Y%m%d_%H%M%S')
-        
-        return Response(
-            image_bytes,
-            mimetype='image/jpeg',
-            headers={
-                'Content-Disposition': f'attachment; filename=Report_DMC_{dmc}_{timestamp}.jpg'
-            }
-        )
+        return _download_response(image_bytes, 'image/jpeg', f'Report_DMC_{dmc}_{timestamp}.jpg')
     except Exception as e:
         logging.error(f"Error downloading screenshot: {e}", exc_info=True)
         return jsonify({"error": "Failed to download screenshot"}), 500
 
 
+def _rm(path):
+    """Usuwa plik jednym wywołaniem - brak pliku nie jest błędem."""
+    try:
+        os.unlink(path)
+    except FileNotFoundError:
+        pass
+    except OSError as e:
+        logging.error(f"Could not remove {path}: {e}")
+
+
 @app.route('/api/factory-reset', methods=['POST'])
 def factory_reset():
     logging.warning("=== FACTORY RESET ===")
     try:
         csv_path = None
-        if CONFIG_FILE.exists():
-            try:
-                with open(CONFIG_FILE, 'r', encoding='utf-8') as f:
-                    csv_path = _get_csv_path(json.load(f))
-            except Exception:
-                pass
+        try:
+            with open(CONFIG_FILE, 'rb') as f:
+                csv_path = _get_csv_path(_json_loads(f.read()))
+        except Exception:
+            pass
         
+        _flush_csv()
         with csv_lock:
-            files = [CONFIG_FILE, PORT_FILE, MANUAL_SCAN_LOG_FILE, PDI_CHECK_LOG_FILE]
-            if csv_path and csv_path.exists():
-                files.append(csv_path)
-            
-            for f in files:
-                if f and f.exists():
-                    try:
-                        os.remove(f)
-                    except Exception:
-                        pass
-        
-        for log in LOG_DIR.glob('*'):
-            if log.name != 'app.log':
-                try:
-                    os.remove(log)
-                except Exception:
-                    pass
+            _close_csv()
+            _stats_state["data"] = None
+            for f in (CONFIG_FILE, PORT_FILE, MANUAL_SCAN_LOG_FILE, PDI_CHECK_LOG_FILE, SETTINGS_INDEX_FILE,
+                      STATS_FILE, csv_path):
+                if f:
+                    _rm(f)
+        _invalidate_config_cache()
+        _clear_history_cache()
+
+        with os.scandir(LOG_DIR) as it:
+            for entry in it:
+                if entry.name != 'app.log':
+                    _rm(entry.path)
         
         return jsonify({"success": True})
     except Exception as e:
@@ -1204,6 +2063,31 @@ def factory_reset():
         return jsonify({"success": False, "error": str(e)}), 500
 
 
+def _path_kind(path_str):
+    """Jeden os.stat na ścieżkę: 'dir', 'file' albo None (brak / brak dostępu)."""
+    try:
+        mode = os.stat(path_str).st_mode
+    except (OSError, ValueError):
+        return None
+    if stat.S_ISDIR(mode):
+        return 'dir'
+    return 'file' if stat.S_ISREG(mode) else None
+
+
+STATUS_CACHE_TTL = 2.0  # s - heartbeat z UI nie odpytuje udziału sieciowego przy każdym żądaniu
+_status_cache = {}  # ścieżka -> (time.monotonic(), wynik _path_kind)
+
+
+def _cached_path_kind(path_str):
+    now = time.monotonic()
+    cached = _status_cache.get(path_str)
+    if cached is not None and now - cached[0] < STATUS_CACHE_TTL:
+        return cached[1]
+    kind = _path_kind(path_str)
+    _status_cache[path_str] = (now, kind)
+    return kind
+
+
 @app.route('/api/status', methods=['GET'])
 def get_status():
     """Endpoint do sprawdzania statusu konfiguracji - sprawdza wszystkie 3 ścieżki."""
@@ -1213,9 +2097,9 @@ def get_status():
     excel_file_path = config.get('excelFilePath', '')
 
     # Sprawdź które ścieżki są ustawione
-    settings_ok = settings_folder_str and Path(settings_folder_str).is_dir()
-    reports_ok = reports_folder_str and Path(reports_folder_str).is_dir()
-    excel_ok = excel_file_path and Path(excel_file_path).is_file()
+    settings_ok = settings_folder_str and _cached_path_kind(settings_folder_str) == 'dir'
+    reports_ok = reports_folder_str and _cached_path_kind(reports_folder_str) == 'dir'
+    excel_ok = excel_file_path and _cached_path_kind(excel_file_path) == 'file'
 
     # Status: READY jeśli wszystkie 3 ścieżki OK
     if settings_ok and reports_ok and excel_ok:
@@ -1243,6 +2127,52 @@ def get_status():
 
 
 # === Server Startup ===
+WSGI_THREADS = 8
+SERVER_READY_TIMEOUT = 5.0
+
+
+def wait_for_server(port, timeout=SERVER_READY_TIMEOUT):
+    """Czeka, aż serwer przyjmie połączenie TCP na porcie. Zwraca False po przekroczeniu czasu."""
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        with socket.socket(socket.AF_INET, socket.SOCK_STREAM) as sock:
+            sock.settimeout(0.1)
+            if sock.connect_ex(('127.0.0.1', port)) == 0:
+                return True
+        time.sleep(0.05)
+    return False
+
+
+_ADDR_IN_USE_ERRNOS = {errno.EADDRINUSE, getattr(errno, 'WSAEADDRINUSE', errno.EADDRINUSE)}
+
+
+def probe_port(port):
+    """Sprawdza, czy port da się zbindować, zanim zostanie zapisany do PORT_FILE; zajęty -> OSError."""
+    with socket.socket(socket.AF_INET, socket.SOCK_STREAM) as s:
+        if os.name != 'nt':
+            # Jak serwer - gniazda w TIME_WAIT po poprzednim uruchomieniu nie blokują portu
+            s.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+        try:
+            s.bind(('127.0.0.1', port))
+        except OSError as e:
+            if e.errno in _ADDR_IN_USE_ERRNOS:
+                raise OSError(errno.EADDRINUSE, "Address already in use")
+            # EACCES / WinError 10013 (zarezerwowany zakres) itp. - błąd konfiguracji, nie zajęty port
+            logging.error(f"Cannot bind 127.0.0.1:{port}: {e}")
+            raise
+
+
+def run_server(port):
+    """Serwuje aplikację przez waitress (pula wątków), a bez niego przez serwer deweloperski Flask.
+
+    SC_DEV_SERVER=1 wymusza serwer deweloperski (np. do debugowania)."""
+    if WAITRESS_AVAILABLE and not os.environ.get('SC_DEV_SERVER'):
+        logging.info(f"Serving with waitress ({WSGI_THREADS} threads) on port {port}")
+        waitress_serve(app, host='127.0.0.1', port=port, threads=WSGI_THREADS, channel_timeout=60)
+    else:
+        app.run(port=port, debug=False, host='127.0.0.1', use_reloader=False, threaded=True)
+
+
 if __name__ == '__main__':
     INITIAL_PORT = 5001
     MAX_PORT_ATTEMPTS = 5
@@ -1255,6 +2185,8 @@ if __name__ == '__main__':
         except Exception as e:
             logging.warning(f"Failed to remove old port file: {e}")
 
+    warm_settings_index(load_config_from_file().get('settingsFolder'))
+
     try:
         for i in range(MAX_PORT_ATTEMPTS):
             test_port = INITIAL_PORT + i
@@ -1262,9 +2194,12 @@ if __name__ == '__main__':
             try:
                 logging.info(f"Step 4: Attempting to start Flask server on port: {test_port}")
 
-                with open(PORT_FILE, 'w', encoding='utf-8') as f:
+                probe_port(test_port)
+                tmp_file = PORT_FILE.with_suffix('.tmp')
+                with open(tmp_file, 'w', encoding='utf-8') as f:
                     f.write(str(test_port))
-                logging.info(f"Step 4a: Wrote tentative port ({test_port}) to {PORT_FILE.name}")
+                os.replace(tmp_file, PORT_FILE)
+                logging.info(f"Step 4a: Wrote port ({test_port}) to {PORT_FILE.name}")
 
                 ACTUAL_PORT = test_port
 
@@ -1275,14 +2210,15 @@ if __name__ == '__main__':
                     
                     def start_server():
                         """Start Flask server in background thread."""
-                        app.run(port=ACTUAL_PORT, debug=False, host='127.0.0.1', use_reloader=False, threaded=True)
+                        run_server(ACTUAL_PORT)
                     
                     # Start Flask in background
                     server_thread = threading.Thread(target=start_server, daemon=True)
                     server_thread.start()
                     
-                    # Wait for server to start
-                    time.sleep(2)
+                    # Wait until the server accepts connections (instead of a fixed delay)
+                    if not wait_for_server(ACTUAL_PORT):
+                        logging.warning(f"Server not reachable on port {ACTUAL_PORT} yet, opening window anyway.")
                     
                     # Create native window
                     webview.create_window(
@@ -1304,20 +2240,20 @@ if __name__ == '__main__':
                         import webbrowser
 
                         def open_browser():
-                            """Opens browser after 5 second delay."""
+                            """Opens browser as soon as the server accepts connections."""
                             try:
-                                time.sleep(5)
+                                wait_for_server(ACTUAL_PORT, timeout=SERVER_READY_TIMEOUT * 2)
                                 webbrowser.open(f'http://127.0.0.1:{ACTUAL_PORT}')
                                 logging.info(f"Browser opened for http://127.0.0.1:{ACTUAL_PORT}")
                             except Exception as e:
                                 logging.warning(f"Could not open browser: {e}")
 
                         threading.Thread(target=open_browser, daemon=True).start()
-                        logging.info("Browser launch scheduled (5s delay)...")
+                        logging.info("Browser launch scheduled (when server is ready)...")
                     except Exception as e:
                         logging.warning(f"Browser auto-launch disabled: {e}")
 
-                    app.run(port=ACTUAL_PORT, debug=False, host='127.0.0.1', use_reloader=False, threaded=True)
+                    run_server(ACTUAL_PORT)
                 break
 
             except OSError as e:
@@ -4,12 +4,27 @@ Converts logo.png to icon.ico for Windows application.
 Requires: pip install pillow
 """
 from PIL import Image
+import hashlib
+import io
+import os
 import sys
 
 def convert_png_to_ico(png_path, ico_path):
-    """Convert PNG to ICO with multiple sizes."""
+    """Convert PNG to ICO with multiple sizes (skipped when logo.png is unchanged)."""
     try:
-        img = Image.open(png_path)
+        with open(png_path, 'rb') as f:
+            png_bytes = f.read()
+
+        # Hash of the source PNG kept next to the icon - same hash means icon.ico is up to date
+        digest = hashlib.sha256(png_bytes).hexdigest()
+        hash_file = os.path.join(os.path.dirname(ico_path), f".{os.path.basename(ico_path)}.sha256")
+        if os.path.exists(ico_path) and os.path.exists(hash_file):
+            with open(hash_file, 'r', encoding='ascii') as f:
+                if f.read().strip() == digest:
+                    print(f"[OK] Ikona aktualna: {ico_path}")
+                    return True
+
+        img = Image.open(io.BytesIO(png_bytes))
         
         # Convert to RGBA if needed
         if img.mode != 'RGBA':
@@ -18,20 +33,23 @@ def convert_png_to_ico(png_path, ico_path):
         # Windows icon sizes
         sizes = [(16, 16), (32, 32), (48, 48), (64, 64), (128, 128), (256, 256)]
         
-        # Prepare multiple sizes
-        icon_images = []
-        for size in sizes:
-            resized = img.resize(size, Image.Resampling.LANCZOS)
-            icon_images.append(resized)
+        # Resample the full-size source only once (to 256x256);
+        # smaller sizes are downscaled from that instead of from the original
+        base = img.resize(sizes[-1], Image.Resampling.LANCZOS)
+        icon_images = [base.resize(size, Image.Resampling.LANCZOS) for size in sizes[:-1]]
+        icon_images.append(base)
         
-        # Save as ICO
-        icon_images[0].save(
+        # Save as ICO from the largest frame - Pillow skips sizes larger than the image it saves from
+        base.save(
             ico_path,
             format='ICO',
             sizes=sizes,
-            append_images=icon_images[1:]
+            append_images=icon_images[:-1]
         )
         
+        with open(hash_file, 'w', encoding='ascii') as f:
+            f.write(digest)
+
         print(f"[OK] Ikona utworzona: {ico_path}")
         return True
         
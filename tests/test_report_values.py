@@ -0,0 +1,59 @@
+"""extract_report_values vs. dawne wyrażenie '.*(PREFIX.*)' na złączonych teststepach."""
+import importlib.util
+import random
+import re
+import shutil
+import sys
+from pathlib import Path
+
+import pytest
+
+SERVER_PY = Path(__file__).resolve().parent.parent / 'app' / 'server.py'
+
+
+@pytest.fixture(scope='module')
+def server(tmp_path_factory):
+    # Kopia w katalogu tymczasowym - user_data/logi nie trafiają do repozytorium
+    app_dir = tmp_path_factory.mktemp('sc') / 'app'
+    app_dir.mkdir()
+    shutil.copy(SERVER_PY, app_dir / 'server.py')
+    argv, sys.argv = sys.argv, ['server.py']
+    try:
+        spec = importlib.util.spec_from_file_location('sc_server', app_dir / 'server.py')
+        module = importlib.util.module_from_spec(spec)
+        spec.loader.exec_module(module)
+    finally:
+        sys.argv = argv
+    return module
+
+
+def old_extract(server, texts):
+    all_text = " ".join(t for t in texts if t)
+    values = {}
+    for prefix in server.REPORT_PREFIXES:
+        match = re.search(rf'.*({prefix}.*)', all_text, re.IGNORECASE)
+        values[prefix] = server.extract_bytes_from_teststep(match.group(1) if match else None)
+    return values
+
+
+@pytest.mark.parametrize('texts', [
+    ["HWEL: 01 02 03\nstatus HWEL ok"],
+    ["HWEL 0A 0B 0C", "0D 0E"],
+    ["x HWEL 11 22 33\ny", "HWEL 44 55 66"],
+    ["Read HWEL: 00 00 B0 8B 02 1E 14", "Read btld 00 00 C1 5B 13 28 02", "Read SWFL 00 00 C1 5F 13 28 04"],
+    ["ſwfl 01 02 03", "Straße HWEL 0a 0b 0c"],
+    [None, "", "BTLD", "01 02 03"],
+    [],
+])
+def test_matches_old_regex(server, texts):
+    assert server.extract_report_values(texts) == old_extract(server, texts)
+
+
+def test_matches_old_regex_random(server):
+    rnd = random.Random(1234)
+    tokens = ['HWEL', 'hwel', 'BTLD', 'Btld', 'SWFL', 'ſwfl', 'ok', 'ß', '\n', ':', ' ',
+              '00', '0A', 'ff', 'C1', '5B', '13 28', 'Read']
+    for _ in range(3000):
+        texts = [' '.join(rnd.choice(tokens) for _ in range(rnd.randint(0, 8)))
+                 for _ in range(rnd.randint(0, 5))]
+        assert server.extract_report_values(texts) == old_extract(server, texts), texts